@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the rewriter.
+
+Each case is warmed up, then timed with time.perf_counter_ns() over
+several repeats; the best repeat is reported (as ns/op and ops/s), since
+it is the least disturbed by other activity on the machine. Pass --json
+to print machine-readable results that can be diffed between runs.
+
+Usage:
+    python examples/benchmark.py [--repeat N] [--number N] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from xtk.rewriter import simplifier, clear_memo
+from xtk.rules.algebra_rules import simplify_rules
+from xtk.rules.deriv_rules import deriv_rules_fixed
+
+
+def nested_product(depth):
+    """Build sin(...(x)...) * (x + x^2) nested depth times."""
+    exp = 'x'
+    for _ in range(depth):
+        exp = ['*', ['sin', exp], ['+', exp, ['^', exp, 2]]]
+    return exp
+
+
+def make_cases():
+    """Return (name, callable) pairs; memo is cleared so each op does real work."""
+    algebra = simplifier(simplify_rules)
+    deriv = simplifier(deriv_rules_fixed)
+    folding = simplifier([])
+    identities = ['+', ['*', 'x', 1], ['*', 0, 'y'], ['+', 'z', 0]]
+    arithmetic = ['+', ['*', 2, 3], ['-', 10, ['/', 8, 2]]]
+    deriv_exp = ['dd', nested_product(3), 'x']
+
+    def run(simplify, exp):
+        def case():
+            clear_memo()
+            simplify(exp)
+        return case
+
+    return [
+        ("algebra-identities", run(algebra, identities)),
+        ("constant-folding", run(folding, arithmetic)),
+        ("derivative-nested", run(deriv, deriv_exp)),
+        ("build-rewriter", lambda: simplifier(deriv_rules_fixed)),
+    ]
+
+
+def bench(fn, repeat, number, warmup=3):
+    """Return the best time per call in ns over ``repeat`` runs of ``number`` calls."""
+    for _ in range(warmup):
+        fn()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter_ns() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per case")
+    parser.add_argument("--number", type=int, default=200, help="calls per repeat")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name, fn in make_cases():
+        ns = bench(fn, args.repeat, args.number)
+        results.append({"case": name, "ns_per_op": round(ns), "ops_per_s": round(1e9 / ns)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['case']:<22} {r['ns_per_op']:>12,} ns/op {r['ops_per_s']:>12,} ops/s")
+
+
+if __name__ == "__main__":
+    main()
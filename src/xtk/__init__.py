@@ -12,6 +12,7 @@ from .rewriter import (
     instantiate,
     evaluate,
     rewriter,
+    clear_memo,
     empty_dictionary,
     extend_dictionary,
     lookup,
@@ -88,13 +89,25 @@ from .cli import (
     main as cli_main,
 )
 
-# Commonly used rules
-from .rules.deriv_rules import deriv_rules_fixed
-from .rules.algebra_rules import (
-    simplify_rules,
-    expand_rules,
-    factor_rules,
-)
+# Commonly used rules, imported on first access (PEP 562) so that
+# ``import xtk`` does not build rule lists the caller never uses
+_RULE_EXPORTS = {
+    "deriv_rules_fixed": "deriv_rules",
+    "simplify_rules": "algebra_rules",
+    "expand_rules": "algebra_rules",
+    "factor_rules": "algebra_rules",
+}
+
+
+def __getattr__(name):
+    if name in _RULE_EXPORTS:
+        import importlib
+        module = importlib.import_module(f".rules.{_RULE_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     # Core functions
@@ -103,6 +116,7 @@ __all__ = [
     "evaluate",
     "rewriter",
     "simplifier",  # Backwards compatibility
+    "clear_memo",
     "empty_dictionary",
     "extend_dictionary",
     "lookup",
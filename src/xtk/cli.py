@@ -5,10 +5,9 @@ Command-line interface and REPL for xtk with rich TUI features.
 import argparse
 import sys
 import os
-import readline
-import atexit
 from typing import Optional, List, Dict, Any
 import json
+from functools import lru_cache
 
 from rich.console import Console
 from rich.tree import Tree as RichTree
@@ -25,9 +24,35 @@ from .rule_utils import normalize_rules, RichRule
 from .explainer import RewriteExplainer
 
 
+@lru_cache(maxsize=None)
+def _markdown(text: str) -> Markdown:
+    """Parse static Markdown (help, welcome) once; rendering does not modify it."""
+    return Markdown(text)
+
+
+@lru_cache(maxsize=256)
+def _parse_expression(text: str) -> Any:
+    """
+    Parse an S-expression (if text starts with '(') or a DSL expression.
+
+    Results are cached, so re-entering an expression skips the parser.
+    Callers share the returned lists; expressions are never modified in
+    place, so this is safe.
+    """
+    if text.startswith('('):
+        return parse_sexpr(text)
+    return dsl_parser.parse(text)
+
+
 class XTKRepl:
     """Interactive REPL for xtk with rich TUI."""
 
+    COMMANDS = (
+        'help', 'quit', 'exit', 'clear', 'history',
+        'rewrite', 'rw', 'eval', 'tree', 'trace', 'trace-explain',
+        'rules', 'vars', 'latex', 'render', 'constant-folding', 'explain'
+    )
+
     def __init__(self):
         self.console = Console()
         self.history = []
@@ -37,6 +62,9 @@ class XTKRepl:
         self.variables = {}
         self.constant_folding_enabled = True  # Toggle for constant folding
         self.last_rewrite_info = None  # Track last rewrite for /explain
+        self._completion_text = None  # Prefix the cached completions are for
+        self._completions = []
+        self._input = input  # Reads a line for run(); replaceable for scripted input
 
         # Setup LLM explainer (defaults to fallback mode if no API key)
         try:
@@ -52,10 +80,21 @@ class XTKRepl:
         except Exception:
             self.explainer = RewriteExplainer.from_config("none")
 
-        self.setup_readline()
+        # Only an interactive session needs history and completion;
+        # XTK_NO_READLINE turns them off (e.g. for tests). stdin is None
+        # under pythonw and in some embedded interpreters
+        if (sys.stdin is not None and sys.stdin.isatty()
+                and not os.environ.get('XTK_NO_READLINE')):
+            self.setup_readline()
 
     def setup_readline(self):
         """Setup readline for better interaction."""
+        try:
+            import readline
+        except ImportError:  # Not available on every platform
+            return
+        import atexit
+
         histfile = os.path.expanduser('~/.xtk_history')
         try:
             readline.read_history_file(histfile)
@@ -67,24 +106,26 @@ class XTKRepl:
         readline.parse_and_bind('tab: complete')
         readline.set_completer(self.complete)
 
-    def complete(self, text, state):
-        """Tab completion for commands and variables."""
-        commands = [
-            'help', 'quit', 'exit', 'clear', 'history',
-            'rewrite', 'rw', 'eval', 'tree', 'trace', 'trace-explain',
-            'rules', 'vars', 'latex', 'render', 'constant-folding', 'explain'
-        ]
-
+    def complete_all(self, text: str) -> List[str]:
+        """Return every completion of text: matching commands, then variables."""
         # Add / prefix if user hasn't typed it yet
         if text.startswith('/'):
-            options = ['/' + cmd for cmd in commands if cmd.startswith(text[1:])]
+            options = ['/' + cmd for cmd in self.COMMANDS if cmd.startswith(text[1:])]
         else:
-            options = [cmd for cmd in commands if cmd.startswith(text)]
+            options = [cmd for cmd in self.COMMANDS if cmd.startswith(text)]
 
         options.extend([var for var in self.variables if var.startswith(text)])
+        return options
 
-        if state < len(options):
-            return options[state]
+    def complete(self, text, state):
+        """Tab completion for commands and variables."""
+        # readline asks for state 0, 1, 2, ... until None for one prefix, so
+        # collect the matches on state 0 and index into them afterwards
+        if state == 0 or text != self._completion_text:
+            self._completion_text, self._completions = text, self.complete_all(text)
+
+        if state < len(self._completions):
+            return self._completions[state]
         return None
 
     @property
@@ -111,7 +152,7 @@ class XTKRepl:
 
         while True:
             try:
-                line = input("xtk> ").strip()
+                line = self._input("xtk> ").strip()
 
                 if not line:
                     continue
@@ -143,7 +184,7 @@ Try:
 - `/tree` - Visualize expression tree
 - `/rules load algebra` - Load rewrite rules
         """
-        self.console.print(Panel(Markdown(welcome), border_style="cyan"))
+        self.console.print(Panel(_markdown(welcome), border_style="cyan"))
 
     def process_line(self, line: str):
         """Process a single input line."""
@@ -176,12 +217,7 @@ Try:
 
         # Parse and display expression
         try:
-            # Try parsing as S-expression first
-            if line.startswith('('):
-                expr = Expression(parse_sexpr(line))
-            else:
-                # Try parsing as DSL
-                expr = Expression(dsl_parser.parse(line))
+            expr = Expression(_parse_expression(line))
 
             # Store in history
             self.history.append(expr)
@@ -309,7 +345,7 @@ Operations are expressed as functions in expressions:
 /rw
 ```
         """
-        self.console.print(Markdown(help_text))
+        self.console.print(_markdown(help_text))
 
     def show_history(self):
         """Show expression history in a table."""
@@ -351,11 +387,7 @@ Operations are expressed as functions in expressions:
                     self.console.print(f"[red]Invalid reference: {expr_str}[/red]")
                     return
             else:
-                # Parse expression
-                if expr_str.startswith('('):
-                    expr = Expression(parse_sexpr(expr_str))
-                else:
-                    expr = Expression(dsl_parser.parse(expr_str))
+                expr = Expression(_parse_expression(expr_str))
 
             self.variables[name] = expr
             self.console.print(f"[green]{name}[/green] = {expr.to_string()}")
@@ -496,19 +528,22 @@ Operations are expressed as functions in expressions:
             logger.save()
 
             # Display steps
-            steps = logger.get_steps()
-
             self.console.print(Panel("[bold cyan]Rewriting Trace[/bold cyan]", border_style="cyan"))
 
-            for step in steps:
+            # Collect the lines and print them together: each console.print
+            # call has a fixed cost well above building the string
+            lines = []
+            for step in logger:
                 if step['type'] == 'initial':
-                    self.console.print(f"[yellow]Initial:[/yellow] {step['expression']}")
+                    lines.append(f"[yellow]Initial:[/yellow] {step['expression']}")
                 elif step['type'] == 'rewrite':
-                    self.console.print(f"[cyan]Step {step['step']}:[/cyan] {step['after']}")
+                    lines.append(f"[cyan]Step {step['step']}:[/cyan] {step['after']}")
                     if step.get('rule'):
-                        self.console.print(f"  [dim]Rule: {step['rule']}[/dim]")
+                        lines.append(f"  [dim]Rule: {step['rule']}[/dim]")
                 elif step['type'] == 'final':
-                    self.console.print(f"[green]Final:[/green] {step['expression']}")
+                    lines.append(f"[green]Final:[/green] {step['expression']}")
+            if lines:
+                self.console.print("\n".join(lines))
 
         finally:
             # Clean up temp file
@@ -598,11 +633,9 @@ Operations are expressed as functions in expressions:
             logger.save()
 
             # Display steps with explanations
-            steps = logger.get_steps()
-
             self.console.print(Panel("[bold cyan]Rewriting Trace with Explanations[/bold cyan]", border_style="cyan"))
 
-            for i, step in enumerate(steps):
+            for i, step in enumerate(logger):
                 if step['type'] == 'initial':
                     self.console.print(f"\n[yellow]Initial:[/yellow] {step['expression']}")
 
@@ -850,8 +883,9 @@ Operations are expressed as functions in expressions:
             self.console.print(table)
 
 
-def main():
-    """Main CLI entry point."""
+@lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser (once; its grammar is fixed)."""
     parser = argparse.ArgumentParser(description='xtk - Expression Toolkit')
     parser.add_argument('expression', nargs='?', help='Expression to process')
     parser.add_argument('-s', '--simplify', action='store_true',
@@ -866,9 +900,25 @@ def main():
                        default='sexpr', help='Output format')
     parser.add_argument('-i', '--interactive', action='store_true',
                        help='Start interactive REPL')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main CLI entry point.
 
-    args = parser.parse_args()
+    Args:
+        argv: Command-line arguments, without the program name
+            (default: sys.argv[1:])
+    """
+    run_cli(_build_parser().parse_args(argv))
 
+
+def run_cli(args: argparse.Namespace):
+    """Run the CLI for already-parsed arguments.
+
+    Args:
+        args: Arguments as produced by the CLI's argument parser
+    """
     # Start REPL if interactive or no expression given
     if args.interactive or not args.expression:
         repl = XTKRepl()
@@ -878,11 +928,7 @@ def main():
     # Process expression
     console = Console()
     try:
-        # Parse expression
-        if args.expression.startswith('('):
-            expr = Expression(parse_sexpr(args.expression))
-        else:
-            expr = Expression(dsl_parser.parse(args.expression))
+        expr = Expression(_parse_expression(args.expression))
 
         # Load rules if specified
         if args.rules:
@@ -912,7 +958,7 @@ def main():
             console.print(expr.to_string())
 
     except Exception as e:
-        console.print(f"[red]Error: {e}[/red]", file=sys.stderr)
+        Console(stderr=True).print(f"[red]Error: {e}[/red]")
         sys.exit(1)
 
 
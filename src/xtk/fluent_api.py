@@ -2,7 +2,7 @@
 Fluent API for xtk - Expressive and simple interface for symbolic computation.
 """
 
-from typing import Any, List, Union, Optional, Callable, Dict
+from typing import Any, List, Tuple, Union, Optional, Callable, Dict
 from copy import deepcopy
 import logging
 
@@ -42,13 +42,31 @@ class Expression:
     
     def to_string(self) -> str:
         """Convert expression to human-readable string."""
-        def stringify(e):
+        # Walk the tree with an explicit stack of (list, next child index)
+        # frames, writing every fragment into one buffer; deep expressions
+        # cannot hit the recursion limit
+        out: List[str] = []
+        frames: List[Tuple[List[Any], int]] = []
+        e = self.expr
+        while True:
             if isinstance(e, list):
-                if not e:
-                    return "()"
-                return f"({' '.join(stringify(x) for x in e)})"
-            return str(e)
-        return stringify(self.expr)
+                out.append("(")
+                frames.append((e, 0))
+            else:
+                out.append(str(e))
+            # Move to the next child, closing every list that is finished
+            while frames:
+                node, i = frames[-1]
+                if i < len(node):
+                    if i:
+                        out.append(" ")
+                    frames[-1] = (node, i + 1)
+                    e = node[i]
+                    break
+                out.append(")")
+                frames.pop()
+            else:
+                return "".join(out)
     
     def to_latex(self) -> str:
         """Convert expression to LaTeX format."""
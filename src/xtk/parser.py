@@ -5,6 +5,7 @@ Supports both traditional S-expressions and a more readable format.
 """
 
 import re
+import sys
 from typing import Any, List, Union
 
 ExprType = Union[int, float, str, List]
@@ -51,23 +52,28 @@ def parse_sexpr(s: str) -> ExprType:
     tokens = tokenize(s)
     if not tokens:
         raise ParseError("Empty expression")
+    # The helpers below run once per token, so the token count and
+    # parse_atom are bound once here instead of looked up on every call
+    n_tokens = len(tokens)
+    atom = parse_atom
     
     def parse_tokens(tokens: List[str], index: int = 0) -> tuple:
         """Parse tokens starting at index."""
-        if index >= len(tokens):
+        if index >= n_tokens:
             raise ParseError("Unexpected end of expression")
         
         token = tokens[index]
         
         if token == '(':
             # Parse a list
-            result = []
+            result: List[ExprType] = []
+            append = result.append
             index += 1
-            while index < len(tokens) and tokens[index] != ')':
+            while index < n_tokens and tokens[index] != ')':
                 item, index = parse_tokens(tokens, index)
-                result.append(item)
+                append(item)
             
-            if index >= len(tokens):
+            if index >= n_tokens:
                 raise ParseError("Missing closing parenthesis")
             
             return result, index + 1
@@ -77,7 +83,7 @@ def parse_sexpr(s: str) -> ExprType:
         
         else:
             # Parse an atom
-            return parse_atom(token), index + 1
+            return atom(token), index + 1
     
     expr, final_index = parse_tokens(tokens, 0)
     
@@ -109,8 +115,10 @@ def parse_atom(token: str) -> Union[int, float, str]:
     except ValueError:
         pass
     
-    # Return as string (variable or operator)
-    return token
+    # Return as string (variable or operator), interned so that it is the
+    # same object as the equal symbol in compiled rules and the
+    # matchers' == tests short-circuit on identity
+    return sys.intern(token)
 
 
 def format_sexpr(expr: ExprType, indent: int = 0) -> str:
@@ -300,7 +308,7 @@ class DSLParser:
         
         # Handle function calls
         if pos + 1 < len(tokens) and tokens[pos + 1] == '(':
-            func_name = token
+            func_name = sys.intern(token)
             pos += 2  # Skip function name and opening paren
             
             # Parse function arguments
@@ -5,10 +5,17 @@ This module provides pattern matching, instantiation, and evaluation
 capabilities for rule-based expression rewriting.
 """
 
+import itertools
 import logging
 from typing import Any, Dict, List, Union, Optional, Callable
-from copy import deepcopy
 from .step_logger import StepLogger
+from .rules._canonical import canonicalize_node, canonicalize_pattern
+from .rules._cache import LFUCache
+from .rules._hashcons import atom_key, term
+from .rules._compile import (freeze, thaw, compile_rule, expression_signature, DecisionTree,
+                             pattern_key, rule_variants)
+from .rules._codegen import compile_candidates
+from .rules.primitives import SKELETON_FUNCTIONS, try_fold
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +23,20 @@ ExprType = Union[int, float, str, List]
 DictType = Union[List[List], str]
 RuleType = List[List]
 
+# Memo of simplified results shared by all rewriters, keyed by
+# (rule set id, hash-consed Term of the expression). Derivative expansions
+# revisit identical subtrees often, so each one is only reduced once; the
+# LFU bound keeps hot subterms and evicts one-off expressions.
+_SIMPLIFY_MEMO = LFUCache(capacity=10_000)
+_MISSING = object()
+_rewriter_ids = itertools.count()
+# Rule set ids by content, so equal rule sets share memo entries
+_RULESET_IDS = LFUCache(capacity=1_000)
+
+# Rule dispatches between reorderings of a rewriter's decision tree leaves
+# by rule hit counts
+_PROMOTE_INTERVAL = 4096
+
 
 class MatchFailure(Exception):
     """Exception raised when pattern matching fails."""
@@ -170,12 +191,20 @@ def eval_exp(s: List) -> Any:
 
 
 def pattern(rule: RuleType) -> ExprType:
-    """Extract the pattern from a rule."""
+    """Extract the pattern from a rule ([pattern, skeleton], frozen tuple or rich dict)."""
+    if isinstance(rule, dict):
+        return rule["pattern"]
+    if isinstance(rule, tuple):
+        return rule[0]
     return car(rule)
 
 
 def skeleton(rule: RuleType) -> ExprType:
-    """Extract the skeleton from a rule."""
+    """Extract the skeleton from a rule ([pattern, skeleton], frozen tuple or rich dict)."""
+    if isinstance(rule, dict):
+        return rule["skeleton"]
+    if isinstance(rule, tuple):
+        return rule[1]
     return car(cdr(rule))
 
 
@@ -229,6 +258,19 @@ def lookup(var: str, dict_: DictType) -> Any:
     return var
 
 
+def _resolve_op(op: Any, dict_: DictType) -> Any:
+    """
+    Find the function an operator in a ":" form refers to.
+
+    A binding wins; an unbound name falls back to SKELETON_FUNCTIONS,
+    otherwise the operator itself is returned (as lookup does).
+    """
+    obj = lookup(op, dict_)
+    if callable(obj) or type(op) is not str:
+        return obj
+    return SKELETON_FUNCTIONS.get(op, obj)
+
+
 def match(pat: ExprType, exp: ExprType, dict_: DictType) -> DictType:
     """
     Match a pattern against an expression with bindings.
@@ -321,7 +363,7 @@ def evaluate(form: ExprType, dict_: DictType) -> ExprType:
         args = cdr(form)
         simplified_args = [evaluate(arg, dict_) for arg in args]
         simplified_form = cons(op, simplified_args)
-        obj = lookup(op, dict_)
+        obj = _resolve_op(op, dict_)
         
         if callable(obj):
             try:
@@ -342,140 +384,257 @@ def evaluate(form: ExprType, dict_: DictType) -> ExprType:
     return form
 
 
-def rewriter(the_rules: List[RuleType], step_logger: Optional[StepLogger] = None, constant_folding: bool = True) -> Callable:
+def _memo_key(exp: ExprType) -> Any:
+    """Return a hashable key for an expression (nested tuples of atom keys)."""
+    # Tuples too: frozen rules are nested tuples, and their numbers need
+    # the same type tags as those of list rules
+    if isinstance(exp, (list, tuple)):
+        return tuple(_memo_key(e) for e in exp)
+    return atom_key(exp)
+
+
+def _rule_key(rule: RuleType) -> Any:
+    """Return a hashable key for a rule in [pattern, skeleton] or dict form."""
+    if isinstance(rule, dict):
+        return tuple(sorted((name, _memo_key(value)) for name, value in rule.items()))
+    return _memo_key(rule)
+
+
+def _ruleset_id(the_rules: List[RuleType], *options: Any) -> int:
+    """
+    Return the memo id for a rule set and rewriter options.
+
+    Rewriters built from equal rules and options (e.g. one per
+    Expression.simplify call) get the same id and so share memo entries.
+    Rule sets that cannot be hashed get a fresh id.
+    """
+    try:
+        key = (tuple(_rule_key(rule) for rule in the_rules), options)
+        return _RULESET_IDS.get_or_compute(key, lambda: next(_rewriter_ids))
+    except TypeError:
+        return next(_rewriter_ids)
+
+
+def clear_memo() -> None:
+    """Clear the memo of simplified expressions shared by all rewriters."""
+    _SIMPLIFY_MEMO.clear()
+
+
+def _with_canonical_pattern(rule: RuleType) -> RuleType:
+    """Return a copy of a rule whose pattern is in canonical argument order."""
+    if isinstance(rule, dict):
+        return {**rule, "pattern": canonicalize_pattern(rule["pattern"])}
+    return [canonicalize_pattern(thaw(pattern(rule)))] + list(rule[1:])
+
+
+def _drop_shadowed(compiled_rules: List) -> List:
+    """
+    Drop rules that an earlier rule always matches first.
+
+    When rule sets are concatenated the same left-hand side (up to
+    renaming its variables) can appear twice; with first-match semantics
+    the later copy can never fire, but would still be tried. Rules with
+    a "when" condition do not shadow anything, since they may decline.
+    """
+    covered = set()
+    kept = []
+    for entry in compiled_rules:
+        keys = [pattern_key(variant) for variant in rule_variants(entry)]
+        if all(key in covered for key in keys):
+            logger.debug(f"Dropping rule shadowed by an earlier one: {entry.rule}")
+            continue
+        kept.append(entry)
+        if not (isinstance(entry.rule, dict) and entry.rule.get("when") is not None):
+            covered.update(keys)
+    return kept
+
+
+def rewriter(the_rules: List[RuleType], step_logger: Optional[StepLogger] = None, constant_folding: bool = True,
+             canonical_order: bool = False, prefer_reducing: bool = False,
+             fold_functions: bool = False) -> Callable:
     """
     Create a rewriter function using given rules.
 
     Args:
-        the_rules: List of transformation rules
+        the_rules: List of transformation rules, as [pattern, skeleton]
+            pairs (lists, or frozen tuples as made by freeze) or rich
+            dicts; a dict with "commute": True also matches
+            its binary pattern with the two arguments swapped, and one
+            with a "when" predicate only applies when it returns true
+            for the bindings (given as a {name: value} dict)
         step_logger: Optional step logger for tracking transformations
         constant_folding: Enable automatic constant folding (default: True)
+        canonical_order: Move numeric arguments of + and * to the front,
+            in both rule patterns and expressions, so one rule matches
+            either operand order (default: False)
+        prefer_reducing: When several rules match a node, apply the one
+            that shrinks the expression most (skeleton size minus pattern
+            size, or a rule's "cost" entry) instead of the first one
+            (default: False)
+        fold_functions: With constant folding, also evaluate exp, log,
+            sin, cos and abs of a constant to a float (default: False,
+            which keeps e.g. ['sin', 1] symbolic)
 
     Returns:
         A function that rewrites expressions
     """
-    def simplify_exp(exp, is_root=False):
-        """Simplify an expression using the rules."""
+    if canonical_order:
+        the_rules = [_with_canonical_pattern(rule) for rule in the_rules]
+
+    # Freeze each pattern/skeleton into interned tuples and compile them
+    # into specialized matcher/builder functions (keeping the original rule
+    # for logging and its position for ordering), then build a decision
+    # tree over their heads, arities and literal arguments, emitted as one
+    # function of nested ifs. Each node only scans the rules at its leaf,
+    # and a 64-bit literal mask plus pattern depth lets most of those be
+    # rejected before the matcher walks the tree.
+    compiled_rules = [compile_rule(rule, position)
+                      for position, rule in enumerate(the_rules)]
+    if not prefer_reducing:
+        # prefer_reducing weighs every match, so only first-match mode
+        # can skip duplicate left-hand sides
+        compiled_rules = _drop_shadowed(compiled_rules)
+    max_depth = max((entry.depth for entry in compiled_rules), default=0)
+    tree = DecisionTree(compiled_rules)
+    candidates = compile_candidates(tree)
+    # Matches per rule position; every _PROMOTE_INTERVAL dispatches the
+    # tree's leaves are reordered so the rules this workload hits most are
+    # tried first (only past rules they cannot overlap, so results never
+    # change)
+    hits = [0] * len(the_rules)
+    dispatches = 0
+    rewriter_id = _ruleset_id(the_rules, constant_folding, canonical_order, prefer_reducing,
+                              fold_functions)
+
+    def simplify_exp(exp, is_root=False, exp_term=None):
+        """Simplify an expression using the rules (exp_term: its memo key, if known)."""
         logger.debug(f"simplify_exp({exp})")
         
         if is_root and step_logger:
             step_logger.log_initial(exp)
-        
-        max_iterations = 1000  # Prevent infinite loops
-        iterations = 0
-        
-        while iterations < max_iterations:
-            iterations += 1
-            old_exp = deepcopy(exp)
-
-            # Try applying rules
-            result = try_rules(exp)
-            if result != exp:
-                exp = result
-                continue
-
-            # Try constant folding (arithmetic evaluation) if enabled
-            if constant_folding:
-                result = try_constant_fold(exp)
-                if result != exp:
-                    exp = result
-                    continue
-
-            # If compound, simplify parts
-            if compound(exp):
-                result = simplify_parts(exp)
-                if result != exp:
-                    exp = result
-                    continue
 
-            # No changes, we're done
-            if exp == old_exp:
-                break
+        # Memoize compound results; skipped when logging so every step is
+        # still recorded
+        use_memo = step_logger is None and compound(exp)
+        if use_memo:
+            try:
+                if exp_term is None:
+                    exp_term = term(exp)
+                key = (rewriter_id, exp_term)
+                cached = _SIMPLIFY_MEMO.get(key, _MISSING)
+            except TypeError:
+                use_memo = False
+            else:
+                if cached is not _MISSING:
+                    return thaw(cached)
         
+        # Bottom-up: bring the children to normal form first, then rewrite
+        # this node once. A rule's result is itself simplified inside
+        # try_rules, so the children never need to be revisited.
+        if compound(exp):
+            exp = simplify_parts(exp, exp_term.args if use_memo else None)
+            if canonical_order:
+                exp = canonicalize_node(exp)
+
+        # Rules first, so exact results (e.g. 1^x -> 1) win over a float
+        # from folding; fold only when no rule applies
+        result = try_rules(exp)
+        if result is exp and constant_folding:
+            result = try_constant_fold(exp)
+        exp = result
+
         if is_root and step_logger:
-            step_logger.log_final(exp, {'iterations': iterations})
+            step_logger.log_final(exp)
+
+        if use_memo:
+            _SIMPLIFY_MEMO.put(key, freeze(exp))
         
         return exp
     
-    def simplify_parts(exp):
-        """Recursively simplify parts of a compound expression."""
-        if null(exp):
-            return []
-        else:
-            return cons(simplify_exp(car(exp)), simplify_parts(cdr(exp)))
+    def simplify_parts(exp, part_terms=None):
+        """Simplify each part of a compound expression (part_terms: their memo keys)."""
+        if part_terms is None:
+            return [simplify_exp(part) for part in exp]
+        return [simplify_exp(part, exp_term=part_term)
+                for part, part_term in zip(exp, part_terms)]
     
     def try_constant_fold(exp):
-        """Try to evaluate arithmetic on constant operands."""
-        if not compound(exp) or null(exp):
+        """Try to evaluate an operator applied to numeric constants."""
+        result = try_fold(exp, fold_functions)
+        if result is None:
             return exp
 
-        op = car(exp)
-        args = cdr(exp)
-
-        # Check if all arguments are numeric constants
-        if not all(isinstance(arg, (int, float)) for arg in args):
-            return exp
+        # Log constant folding if logger is available
+        if step_logger:
+            step_logger.log_rewrite(
+                before=exp,
+                after=result,
+                rule_pattern=f"constant-fold-{car(exp)}",
+                rule_skeleton=result,
+                bindings=[]
+            )
+
+        return result
+
+    def matches(exp):
+        """Yield (rule, bindings) for each rule matching exp, in rule order."""
+        signature = None
+        for entry in candidates(exp):
+            if entry.lits_mask or entry.depth > 1:
+                if signature is None:
+                    signature = expression_signature(exp, max_depth)
+                exp_mask, exp_depth = signature
+                if entry.lits_mask & ~exp_mask or entry.depth > exp_depth:
+                    continue
 
-        # Evaluate arithmetic operations
-        try:
-            if op == '+' and len(args) == 2:
-                result = args[0] + args[1]
-            elif op == '-' and len(args) == 2:
-                result = args[0] - args[1]
-            elif op == '-' and len(args) == 1:
-                result = -args[0]
-            elif op == '*' and len(args) == 2:
-                result = args[0] * args[1]
-            elif op == '/' and len(args) == 2:
-                result = args[0] / args[1] if args[1] != 0 else exp
-            elif op == '^' and len(args) == 2:
-                result = args[0] ** args[1]
-            else:
-                return exp
-
-            # Log constant folding if logger is available
-            if step_logger:
-                step_logger.log_rewrite(
-                    before=exp,
-                    after=result,
-                    rule_pattern=f"constant-fold-{op}",
-                    rule_skeleton=result,
-                    bindings=[]
-                )
-
-            return result
-        except:
-            return exp
+            dict_ = entry.match(exp)
+            if dict_ is not None:
+                yield entry, dict_
+
+    def promote_hot_rules():
+        """Recompile the candidate lookup with leaves ordered by recent hits."""
+        nonlocal tree, candidates
+        promoted = tree.promoted(hits)
+        if promoted is not tree:
+            tree = promoted
+            candidates = compile_candidates(tree)
+        # Halve the counts so the order follows changes in the workload
+        for i, count in enumerate(hits):
+            hits[i] = count >> 1
 
     def try_rules(exp):
         """Try applying rules to an expression."""
-        def scan(rules):
-            if null(rules):
-                return exp
-            else:
-                rule = car(rules)
-                pat = pattern(rule)
-                skel = skeleton(rule)
-
-                dict_ = match(pat, exp, empty_dictionary())
-                if dict_ == "failed":
-                    return scan(cdr(rules))
-                else:
-                    skel_inst = instantiate(skel, dict_)
-
-                    # Log the rewrite if logger is available
-                    if step_logger:
-                        step_logger.log_rewrite(
-                            before=exp,
-                            after=skel_inst,
-                            rule_pattern=pat,
-                            rule_skeleton=skel,
-                            bindings=dict_
-                        )
-
-                    return simplify_exp(skel_inst)
-
-        return scan(the_rules)
+        nonlocal dispatches
+        if prefer_reducing:
+            # min() keeps the first of equally cheap rules, so ties still
+            # go to the earliest rule
+            found = min(matches(exp), key=lambda m: m[0].cost, default=None)
+        else:
+            found = next(matches(exp), None)
+            dispatches += 1
+            if dispatches == _PROMOTE_INTERVAL:
+                dispatches = 0
+                promote_hot_rules()
+            if found is not None:
+                hits[found[0].position] += 1
+        if found is None:
+            return exp
+
+        entry, dict_ = found
+        rule = entry.rule
+        skel_inst = entry.build(dict_)
+
+        # Log the rewrite if logger is available
+        if step_logger:
+            step_logger.log_rewrite(
+                before=exp,
+                after=skel_inst,
+                rule_pattern=pattern(rule),
+                rule_skeleton=skeleton(rule),
+                bindings=dict_
+            )
+
+        return simplify_exp(skel_inst)
     
     # Return a wrapper that sets is_root=True for the initial call
     def wrapper(exp):
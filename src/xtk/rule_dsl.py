@@ -131,7 +131,13 @@ def parse_rule_line(line: str, description: Optional[str] = None) -> Optional[Pa
     pattern_str = parts[0].strip()
     skeleton_str = parts[1].strip()
 
-    # Parse pattern and skeleton
+    # Reject obviously malformed sides up front rather than relying on
+    # the parser raising (exceptions are costly on the error path)
+    if not _is_well_formed(pattern_str) or not _is_well_formed(skeleton_str):
+        return None
+
+    # Parse pattern and skeleton (defensive fallback for anything the
+    # pre-check can't catch)
     try:
         pattern = parse_dsl_expr(pattern_str)
         skeleton = parse_dsl_expr(skeleton_str)
@@ -146,6 +152,21 @@ def parse_rule_line(line: str, description: Optional[str] = None) -> Optional[Pa
     )
 
 
+def _is_well_formed(text: str) -> bool:
+    """Check that a DSL expression is non-empty with balanced parentheses."""
+    if not text:
+        return False
+    depth = 0
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
 def parse_dsl_expr(text: str) -> Any:
     """
     Parse a DSL expression, converting friendly syntax to internal format.
@@ -8,6 +8,7 @@ import json
 import re
 import sys
 import importlib.util
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Union
 
@@ -63,6 +64,9 @@ def load_python_rules(path: Path) -> List[RuleType]:
         simplify_rules = [[pattern, skeleton], ...]
 
     This function will collect all list variables that look like rule sets.
+    If the module defines ``__all__``, only the names listed there are
+    considered; otherwise all public module globals are scanned in
+    definition order.
     """
     # Import the module dynamically
     spec = importlib.util.spec_from_file_location("_xtk_rules_module", path)
@@ -76,12 +80,17 @@ def load_python_rules(path: Path) -> List[RuleType]:
     # Collect all rules from the module
     all_rules = []
 
-    for name in dir(module):
-        if name.startswith('_'):
-            continue
-
-        obj = getattr(module, name)
+    # Walk the module namespace directly (no sort, no per-name getattr),
+    # honouring __all__ as an explicit export list when present
+    exported = getattr(module, '__all__', None)
+    if exported is not None:
+        namespace = vars(module)
+        items = ((name, namespace[name]) for name in exported if name in namespace)
+    else:
+        items = ((name, obj) for name, obj in vars(module).items()
+                 if not name.startswith('_'))
 
+    for name, obj in items:
         # Check if it looks like a rule set
         if isinstance(obj, list) and obj and is_rule_format(obj[0]):
             all_rules.extend(obj)
@@ -121,8 +130,9 @@ def parse_rules(content: str) -> List[RuleType]:
     if not sexprs:
         return []
     
-    # Parse expressions
-    parsed = [parse_sexpr(s) for s in sexprs]
+    # Parse expressions (identical snippets such as "(? x)" or "0" recur
+    # across rules, so each distinct string is parsed only once)
+    parsed = [_copy_tree(_parse_sexpr_cached(s)) for s in sexprs]
     
     # Determine format and convert to rules
     if is_rule_format(parsed[0]):
@@ -133,6 +143,23 @@ def parse_rules(content: str) -> List[RuleType]:
         return list(zip(parsed[::2], parsed[1::2]))
 
 
+@lru_cache(maxsize=4096)
+def _parse_sexpr_cached(s: str):
+    """Parse an S-expression, memoized on the exact source string.
+
+    The returned structure is shared between callers and must not be
+    mutated; use _copy_tree() before handing it out.
+    """
+    return parse_sexpr(s)
+
+
+def _copy_tree(expr):
+    """Copy the list spine of a parsed expression (atoms are immutable)."""
+    if isinstance(expr, list):
+        return [_copy_tree(e) for e in expr]
+    return expr
+
+
 def extract_sexprs(text: str) -> List[str]:
     """Extract all complete S-expressions from text."""
     sexprs = []
@@ -156,17 +183,20 @@ def extract_sexprs(text: str) -> List[str]:
     return sexprs
 
 
+# Element types allowed on either side of a [pattern, skeleton] pair
+_RULE_ELEM_TYPES = (list, str, int, float)
+
+
 def is_rule_format(expr) -> bool:
     """Check if expression is a complete rule [pattern, skeleton] or rich rule dict."""
     # Rich rule dict format
-    if isinstance(expr, dict) and 'pattern' in expr and 'skeleton' in expr:
-        return True
+    if isinstance(expr, dict):
+        return 'pattern' in expr and 'skeleton' in expr
 
     # Simple [pattern, skeleton] format
-    return (isinstance(expr, list) and
-            len(expr) == 2 and
-            isinstance(expr[0], (list, str, int, float)) and
-            isinstance(expr[1], (list, str, int, float)))
+    if not isinstance(expr, list) or len(expr) != 2:
+        return False
+    return isinstance(expr[0], _RULE_ELEM_TYPES) and isinstance(expr[1], _RULE_ELEM_TYPES)
 
 
 def save_rules(rules: List[RuleType], filepath: Union[str, Path], 
@@ -2,13 +2,18 @@
 Utilities for working with rules, including metadata support.
 """
 
-from typing import Union, Dict, List, Any, Optional, Tuple
+from typing import Union, Dict, List, Any, Optional, Tuple, Callable
 from .rewriter import RuleType
 
 
 class RichRule:
     """A rule with optional metadata for better explanations."""
 
+    # One RichRule is kept per loaded rule; slots keep them small and
+    # attribute access cheap
+    __slots__ = ('pattern', 'skeleton', 'name', 'description', 'category',
+                 'examples', 'commute', 'when')
+
     def __init__(
         self,
         pattern: Any,
@@ -16,7 +21,9 @@ class RichRule:
         name: Optional[str] = None,
         description: Optional[str] = None,
         category: Optional[str] = None,
-        examples: Optional[List[str]] = None
+        examples: Optional[List[str]] = None,
+        commute: bool = False,
+        when: Optional[Callable[[Dict[str, Any]], bool]] = None
     ):
         self.pattern = pattern
         self.skeleton = skeleton
@@ -24,11 +31,35 @@ class RichRule:
         self.description = description
         self.category = category
         self.examples = examples or []
+        self.commute = commute
+        self.when = when
+
+    def to_rule_pair(self) -> Union[RuleType, Dict[str, Any]]:
+        """
+        Convert to [pattern, skeleton] format for rewriter.
 
-    def to_rule_pair(self) -> RuleType:
-        """Convert to [pattern, skeleton] format for rewriter."""
+        A rule with a "when" condition stays a dict, since a plain pair
+        cannot carry it.
+        """
+        if self.when is not None:
+            return {'pattern': self.pattern, 'skeleton': self.skeleton, 'when': self.when}
         return [self.pattern, self.skeleton]
 
+    def to_rule_pairs(self) -> List[Union[RuleType, Dict[str, Any]]]:
+        """
+        Convert to one or more [pattern, skeleton] pairs.
+
+        A commutative rule over a binary pattern expands to two pairs, the
+        second with the pattern's arguments swapped, since plain pairs
+        cannot carry the commute flag.
+        """
+        pair = self.to_rule_pair()
+        pat = self.pattern
+        if not (self.commute and isinstance(pat, list) and len(pat) == 3):
+            return [pair]
+        swapped = RichRule([pat[0], pat[2], pat[1]], self.skeleton, when=self.when)
+        return [pair, swapped.to_rule_pair()]
+
     @classmethod
     def from_rule(cls, rule: Union[List, Dict]) -> 'RichRule':
         """
@@ -47,7 +78,9 @@ class RichRule:
                 name=rule.get('name'),
                 description=rule.get('description'),
                 category=rule.get('category'),
-                examples=rule.get('examples', [])
+                examples=rule.get('examples', []),
+                commute=rule.get('commute', False),
+                when=rule.get('when')
             )
         elif isinstance(rule, list) and len(rule) == 2:
             # Simple [pattern, skeleton] format
@@ -61,7 +94,9 @@ class RichRule:
         return f"RichRule({self.pattern} → {self.skeleton})"
 
 
-def normalize_rules(rules: List[Union[List, Dict]]) -> Tuple[List[RuleType], List[RichRule]]:
+def normalize_rules(
+        rules: List[Union[List, Dict]]
+) -> Tuple[List[Union[RuleType, Dict[str, Any]]], List[RichRule]]:
     """
     Normalize a list of rules to both formats.
 
@@ -69,10 +104,17 @@ def normalize_rules(rules: List[Union[List, Dict]]) -> Tuple[List[RuleType], Lis
         rules: List of rules in any format
 
     Returns:
-        Tuple of (rule_pairs, rich_rules) for use in rewriter and explanations
+        Tuple of (rule_pairs, rich_rules) for use in rewriter and explanations.
+        The lists stay parallel: a commutative rule contributes two pairs
+        and appears twice in rich_rules.
     """
-    rich_rules = [RichRule.from_rule(r) for r in rules]
-    rule_pairs = [r.to_rule_pair() for r in rich_rules]
+    rule_pairs: List[Union[RuleType, Dict[str, Any]]] = []
+    rich_rules: List[RichRule] = []
+    for rule in rules:
+        rich_rule = RichRule.from_rule(rule)
+        pairs = rich_rule.to_rule_pairs()
+        rule_pairs.extend(pairs)
+        rich_rules.extend([rich_rule] * len(pairs))
     return rule_pairs, rich_rules
 
 
@@ -0,0 +1,43 @@
+"""
+Predefined rule sets.
+
+Rule modules are loaded on first attribute access (PEP 562), so importing
+the package, as the rewriter does for its helpers, does not build every
+rule list. Modules with hyphenated names (e.g. trig-rules.py) are loaded
+by path through xtk.rule_loader; importable ones are re-exported here.
+"""
+
+import importlib
+
+# Exported name -> importable module defining it
+_MODULE_EXPORTS = {
+    "integral_rules": "integral_rules",
+    "integrate": "integral_rules",
+}
+
+# Exported name -> hyphenated rule file defining it
+_FILE_EXPORTS = {
+    "exp_log_rules": "exp-log.py",
+    "limit_rules": "limit-rules.py",
+    "trig_rules": "trig-rules.py",
+}
+
+__all__ = ["integral_rules", "integrate", "exp_log_rules", "limit_rules", "trig_rules"]
+
+
+def __getattr__(name):
+    if name in _MODULE_EXPORTS:
+        module = importlib.import_module(f".{_MODULE_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _FILE_EXPORTS:
+        from pathlib import Path
+        from ..rule_loader import load_python_rules
+        value = load_python_rules(Path(__file__).with_name(_FILE_EXPORTS[name]))
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,84 @@
+"""
+Bounded least-frequently-used cache for rewrite results.
+
+Long sessions keep reducing the same small subterms (``x``, ``sin(x)``,
+``dd`` of them) while large one-off expressions pass through once. An LFU
+policy keeps the former and evicts the latter, and the capacity bound
+keeps the memo from growing without limit.
+"""
+
+import heapq
+import itertools
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class LFUCache:
+    """
+    A mapping of bounded size that evicts its least frequently used key.
+
+    Ties between equally frequent keys go to the one least recently
+    touched. Frequencies live in a Counter; eviction uses a heap of
+    (frequency, tick, key) entries, with stale entries skipped lazily.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        if capacity <= 0:
+            raise ValueError("LFUCache capacity must be positive")
+        self.capacity = capacity
+        self._data: Dict[Hashable, Any] = {}
+        self._freq: Counter = Counter()
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._tick = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def _touch(self, key: Hashable) -> None:
+        self._freq[key] += 1
+        heapq.heappush(self._heap, (self._freq[key], next(self._tick), key))
+        # Each access leaves one stale heap entry behind; rebuild from the
+        # live counts once they dominate
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(self._freq[k], next(self._tick), k) for k in self._data]
+            heapq.heapify(self._heap)
+
+    def _evict(self) -> None:
+        while self._heap:
+            freq, _, key = heapq.heappop(self._heap)
+            if key in self._data and self._freq[key] == freq:
+                del self._data[key]
+                del self._freq[key]
+                return
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (counting the use), or default."""
+        if key not in self._data:
+            return default
+        self._touch(key)
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least frequently used key if full."""
+        if key not in self._data and len(self._data) >= self.capacity:
+            self._evict()
+        self._data[key] = value
+        self._touch(key)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it if missing."""
+        if key in self._data:
+            self._touch(key)
+            return self._data[key]
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+        self._freq.clear()
+        self._heap.clear()
@@ -0,0 +1,60 @@
+"""
+Canonical argument order for commutative operators.
+
+Children of ``+`` and ``*`` nodes are reordered so numeric constants come
+first (sorted by repr) while everything else keeps its relative order.
+Applied to both expressions and rule patterns, a rule such as
+``(* ?c:a ?x)`` then matches ``x·3`` as well as ``3·x``.
+
+Only numbers are moved. A ``?`` pattern variable can match anything, so
+fully sorting symbolic arguments could place a pattern and the
+expressions it should match in different orders.
+"""
+
+from typing import Any
+
+COMMUTATIVE_OPS = frozenset(("+", "*"))
+
+
+def _is_number(x: Any) -> bool:
+    return isinstance(x, (int, float))
+
+
+def _sorted_args(args, is_constant):
+    constants = sorted((a for a in args if is_constant(a)), key=repr)
+    if not constants:
+        return args
+    return constants + [a for a in args if not is_constant(a)]
+
+
+def canonicalize_node(exp: Any) -> Any:
+    """Put the arguments of a single commutative node in canonical order."""
+    if (type(exp) is not list or len(exp) < 3
+            or type(exp[0]) is not str or exp[0] not in COMMUTATIVE_OPS):
+        return exp
+    args = exp[1:]
+    ordered = _sorted_args(args, _is_number)
+    if ordered is args or ordered == args:
+        return exp
+    return [exp[0]] + ordered
+
+
+def _is_constant_pattern(pat: Any) -> bool:
+    return _is_number(pat) or (isinstance(pat, list) and len(pat) == 2 and pat[0] == "?c")
+
+
+def canonicalize_pattern(pat: Any) -> Any:
+    """
+    Put the commutative nodes of a rule pattern in canonical order.
+
+    Numeric literals and ``?c`` variables (which only match numbers) are
+    moved to the front, mirroring canonicalize_node.
+    """
+    if type(pat) is not list or not pat:
+        return pat
+    if type(pat[0]) is str and pat[0] in ("?", "?c", "?v"):
+        return pat
+    pat = [canonicalize_pattern(p) for p in pat]
+    if len(pat) < 3 or type(pat[0]) is not str or pat[0] not in COMMUTATIVE_OPS:
+        return pat
+    return [pat[0]] + _sorted_args(pat[1:], _is_constant_pattern)
@@ -0,0 +1,75 @@
+"""
+Code generation for rule-set decision trees.
+
+DecisionTree.candidates interprets the tree: for every node it walks the
+Switch path from the root and builds a lookup key. Here the whole tree is
+instead emitted as one Python function of nested ``if`` statements, with
+each tested position bound to a local once (the same ``e0_1_2`` naming
+the pattern matchers use), so dispatch is straight-line code.
+"""
+
+from typing import Any, Callable, Optional, Tuple
+
+from ._compile import _ATOMS, _CodeGen, _path_var, DecisionTree, TryLeaf
+
+_INDENT = "    "
+
+
+def _emit_node(gen: _CodeGen, node: Any, depth: int, emit_leaf: Callable) -> None:
+    """Emit code for a tree node; every path through it ends in a return."""
+    pad = _INDENT * depth
+    if type(node) is TryLeaf:
+        emit_leaf(gen, node, depth)
+        return
+
+    var = _path_var(node.path)
+    list_cases = [(key[1], sub) for key, sub in node.cases.items() if type(key) is tuple]
+    atom_cases = [(key, sub) for key, sub in node.cases.items() if type(key) is not tuple]
+    # A case that does not apply falls through to the default below
+    if list_cases:
+        gen.lines.append(f"{pad}if isinstance({var}, list):")
+        for arity, sub in list_cases:
+            gen.lines.append(f"{pad}{_INDENT}if len({var}) == {arity}:")
+            for i in range(arity):
+                child = _path_var(node.path + (i,))
+                gen.lines.append(f"{pad}{_INDENT * 2}{child} = {var}[{i}]")
+            _emit_node(gen, sub, depth + 2, emit_leaf)
+    if atom_cases:
+        gen.lines.append(f"{pad}if isinstance({var}, _ATOMS):")
+        for key, sub in atom_cases:
+            gen.lines.append(f"{pad}{_INDENT}if {var} == {gen.const(key)}:")
+            _emit_node(gen, sub, depth + 2, emit_leaf)
+    _emit_node(gen, node.default, depth, emit_leaf)
+
+
+def _emit_candidates_leaf(gen: _CodeGen, leaf: TryLeaf, depth: int) -> None:
+    gen.lines.append(f"{_INDENT * depth}return {gen.const(leaf.rules)}")
+
+
+def _compile_tree(tree: DecisionTree, name: str,
+                  emit_leaf: Callable) -> Optional[Callable]:
+    gen = _CodeGen()
+    _emit_node(gen, tree.root, 1, emit_leaf)
+    source = f"def {name}(e0):\n" + "".join(f"{line}\n" for line in gen.lines)
+    namespace = dict(gen.consts, _ATOMS=_ATOMS)
+    try:
+        exec(source, namespace)
+    except (SyntaxError, RecursionError, MemoryError):
+        # Pathologically deep trees exceed the parser's nesting limits
+        return None
+    return namespace[name]
+
+
+def compile_candidates(tree: DecisionTree) -> Callable[[Any], Tuple]:
+    """
+    Compile a decision tree into a candidate-lookup function.
+
+    Args:
+        tree: The rule set's DecisionTree
+
+    Returns:
+        A function equivalent to ``tree.candidates`` (falls back to it if
+        the tree is too deep to compile)
+    """
+    candidates = _compile_tree(tree, "_candidates", _emit_candidates_leaf)
+    return tree.candidates if candidates is None else candidates
@@ -0,0 +1,661 @@
+"""
+Compiled (frozen) rule representation used by the rewriter.
+
+Rule sets are published as nested lists so they stay easy to read, edit,
+serialize and load by path. The rewriter never mutates them, so before
+rewriting it converts each pattern and skeleton into nested tuples with
+interned symbols: smaller, hashable, and cheaper to walk in the hot
+matching loop.
+"""
+
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Imported as a module (not ``from ... import``) because the rewriter
+# itself imports this module while it is being initialized
+from .. import rewriter as _rewriter
+
+_PATTERN_VARS = ("?", "?c", "?v")
+
+
+def freeze(x: Any) -> Any:
+    """Recursively convert lists and tuples to tuples and intern string atoms."""
+    if isinstance(x, (list, tuple)):
+        return tuple(freeze(e) for e in x)
+    if type(x) is str:
+        return sys.intern(x)
+    return x
+
+
+# Interning table for frozen subtrees shared across rules, keyed by a
+# type-tagged form so that e.g. (":", 1) and (":", 1.0) stay distinct
+_SHARED: Dict[Any, Any] = {}
+
+
+def _share_key(x: Any) -> Any:
+    if type(x) is tuple:
+        return tuple(_share_key(e) for e in x)
+    return (type(x), x)
+
+
+def share(x: Any) -> Any:
+    """
+    Return the canonical instance of a frozen subtree.
+
+    Structurally identical subtrees of different rules (``(":", "x")``,
+    ``("^", (":", "g"), 2)``...) then become the same object. Unhashable
+    subtrees are returned unchanged.
+    """
+    if type(x) is not tuple:
+        return x
+    x = tuple(share(e) for e in x)
+    try:
+        return _SHARED.setdefault(_share_key(x), x)
+    except TypeError:
+        return x
+
+
+def thaw(x: Any) -> Any:
+    """Recursively convert tuples back to lists."""
+    if isinstance(x, tuple):
+        return [thaw(e) for e in x]
+    return x
+
+
+# Atom types a literal pattern element may match (mirrors rewriter.atom)
+_ATOMS = (int, float, str)
+
+
+class _CodeGen:
+    """Accumulates generated source lines and the constants they refer to."""
+
+    def __init__(self):
+        self.lines = []
+        self.consts = {}
+
+    def const(self, value: Any) -> str:
+        """Return source text for a constant, inlining plain ints/strings."""
+        if type(value) in (int, str):
+            return repr(value)
+        name = f"_k{len(self.consts)}"
+        self.consts[name] = value
+        return name
+
+
+# Kinds of entries in a flattened pattern (see pattern_paths); the
+# variable kinds sort below LITERAL
+WILD, WILD_CONST, WILD_VAR, LITERAL, SUBPAT = range(5)
+
+_VAR_KINDS = {"?": WILD, "?c": WILD_CONST, "?v": WILD_VAR}
+
+
+def pattern_paths(pat: Any, path: Tuple[int, ...] = ()) -> List[Tuple]:
+    """
+    Flatten a frozen pattern into (path, kind, value) entries in pre-order.
+
+    ``path`` is the index sequence from the root, ``kind`` one of WILD,
+    WILD_CONST, WILD_VAR (value: variable name), LITERAL (value: the atom)
+    or SUBPAT (value: arity of the compound at that path). For
+    ``(* ?a (+ ?x ?y))`` this gives::
+
+        [((), SUBPAT, 3), ((0,), LITERAL, "*"), ((1,), WILD, "a"),
+         ((2,), SUBPAT, 3), ((2, 0), LITERAL, "+"), ((2, 1), WILD, "x"),
+         ((2, 2), WILD, "y")]
+    """
+    if type(pat) is not tuple:
+        return [(path, LITERAL, pat)]
+    if pat and type(pat[0]) is str and pat[0] in _VAR_KINDS:
+        return [(path, _VAR_KINDS[pat[0]], pat[1])]
+    entries = [(path, SUBPAT, len(pat))]
+    for i, sub in enumerate(pat):
+        entries.extend(pattern_paths(sub, path + (i,)))
+    return entries
+
+
+def pattern_key(pat: Any) -> Tuple:
+    """
+    Return a key equal for patterns that match exactly the same expressions.
+
+    Variables are alpha-renamed to their order of first appearance, so
+    ``(+ ?x 0)`` and ``(+ ?y 0)`` get the same key while ``(+ ?x ?x)``
+    and ``(+ ?x ?y)`` do not.
+    """
+    names: Dict[Any, int] = {}
+    key = []
+    for path, kind, value in pattern_paths(pat):
+        if kind < LITERAL:
+            value = names.setdefault(value, len(names))
+        key.append((path, kind, value))
+    return tuple(key)
+
+
+def _path_var(path: Tuple[int, ...]) -> str:
+    return "e0" + "".join(f"_{i}" for i in path)
+
+
+# Patterns with at least this many variables are matched shape-first
+_SHAPE_FIRST_MIN_VARS = 3
+
+
+def match_strategy(pat: Any) -> str:
+    """
+    Return "shape-first" for broad patterns with many variables, else "in-order".
+
+    Shallow patterns with many variables (FOIL, combine-like-terms) are
+    mostly rejected by their structure, so their matchers check every
+    compound arity and literal before looking at any variable.
+    """
+    n_vars = sum(1 for _, kind, _ in pattern_paths(pat) if kind < LITERAL)
+    return "shape-first" if n_vars >= _SHAPE_FIRST_MIN_VARS else "in-order"
+
+
+def _emit_shape(gen: _CodeGen, path: Tuple[int, ...], kind: int, value: Any) -> None:
+    var = _path_var(path)
+    if kind == SUBPAT:
+        gen.lines.append(
+            f"if not isinstance({var}, list) or len({var}) != {value}: return None")
+        for i in range(value):
+            gen.lines.append(f"{_path_var(path + (i,))} = {var}[{i}]")
+    else:
+        gen.lines.append(
+            f"if not isinstance({var}, _ATOMS) or {var} != {gen.const(value)}: return None")
+
+
+def _emit_var(gen: _CodeGen, path: Tuple[int, ...], kind: int, name: Any,
+              bound: dict) -> None:
+    var = _path_var(path)
+    if kind == WILD_CONST:
+        gen.lines.append(f"if not isinstance({var}, (int, float)): return None")
+    elif kind == WILD_VAR:
+        gen.lines.append(f"if not isinstance({var}, str): return None")
+    else:
+        gen.lines.append(f"if callable({var}): return None")
+    if name in bound:
+        gen.lines.append(f"if {var} != {bound[name]}: return None")
+    else:
+        bound[name] = var
+
+
+def _emit_match(gen: _CodeGen, pat: Any, bound: dict) -> None:
+    """Emit straight-line checks along the precomputed paths of ``pat``."""
+    entries = pattern_paths(pat)
+    if match_strategy(pat) == "shape-first":
+        # Structure and literals first, then variables (still in pre-order,
+        # so bindings come out in the same order)
+        for path, kind, value in entries:
+            if kind >= LITERAL:
+                _emit_shape(gen, path, kind, value)
+        for path, kind, value in entries:
+            if kind < LITERAL:
+                _emit_var(gen, path, kind, value, bound)
+        return
+
+    for path, kind, value in entries:
+        if kind >= LITERAL:
+            _emit_shape(gen, path, kind, value)
+        else:
+            _emit_var(gen, path, kind, value, bound)
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pat: Any) -> Callable[[Any], Optional[List]]:
+    """
+    Compile a frozen pattern into a specialized matcher function.
+
+    The pattern is flattened once into precomputed paths (pattern_paths)
+    and turned into straight-line Python (type/length/literal checks and
+    local assignments), so matching no longer interprets the pattern on
+    every node visited. Compiled
+    matchers are cached by pattern, which is safe because literals are
+    compared with ``==`` exactly as the interpreted matcher does.
+
+    Args:
+        pat: Frozen pattern (see freeze)
+
+    Returns:
+        A function ``matcher(exp)`` returning bindings as [name, value]
+        pairs on success (in the same order as rewriter.match) or None
+    """
+    gen = _CodeGen()
+    bound: Dict[Any, str] = {}
+    _emit_match(gen, pat, bound)
+    pairs = ", ".join(f"[{gen.const(name)}, {var}]" for name, var in bound.items())
+    gen.lines.append(f"return [{pairs}]")
+
+    source = "def _match(e0):\n" + "".join(f"    {line}\n" for line in gen.lines)
+    namespace = dict(gen.consts, _ATOMS=_ATOMS)
+    exec(source, namespace)
+    return namespace["_match"]
+
+
+def compile_commutative_pattern(pat: Any) -> Callable[[Any], Optional[List]]:
+    """
+    Compile a binary pattern that also matches with its arguments swapped.
+
+    ``(op, a, b)`` is tried as written first and then as ``(op, b, a)``,
+    so one rule covers both orientations of a commutative operator.
+    Patterns that are not binary compile as with compile_pattern.
+    """
+    first = compile_pattern(pat)
+    if type(pat) is not tuple or len(pat) != 3 or pat[0] in _PATTERN_VARS:
+        return first
+    second = compile_pattern((pat[0], pat[2], pat[1]))
+
+    def _match(exp):
+        bindings = first(exp)
+        return bindings if bindings is not None else second(exp)
+
+    return _match
+
+
+def _emit_build(gen: _CodeGen, skel: Any) -> str:
+    """Return a Python expression that builds ``skel`` from ``bindings``."""
+    if type(skel) is not tuple:
+        return gen.const(skel)
+    if skel and type(skel[0]) is str and skel[0] == ":":
+        form = skel[1]
+        if type(form) is str:
+            # (":", "x") is by far the most common form; evaluate() would
+            # just look it up
+            return f"_lookup({gen.const(form)}, bindings)"
+        return _emit_eval(gen, form)
+    return "[" + ", ".join(_emit_build(gen, s) for s in skel) + "]"
+
+
+def _emit_eval(gen: _CodeGen, form: Any) -> str:
+    """Return a Python expression equivalent to rewriter.evaluate(form, bindings)."""
+    if type(form) is str:
+        return f"_lookup({gen.const(form)}, bindings)"
+    if type(form) is not tuple:
+        return gen.const(form)
+    if not form:
+        return "[]"
+    op = form[0]
+    if type(op) is tuple:
+        # A compound operator is put back into the result as a fresh list
+        return f"_evaluate({gen.const(thaw(form))}, bindings)"
+    args = ", ".join(_emit_eval(gen, arg) for arg in form[1:])
+    fn = f"_resolve({gen.const(op)}, bindings)" if type(op) is str else gen.const(op)
+    return f"_apply({gen.const(op)}, {fn}, [{args}])"
+
+
+def _apply(op: Any, fn: Any, args: List) -> Any:
+    """Call fn on evaluated args as evaluate() does, else rebuild [op, *args]."""
+    if callable(fn):
+        try:
+            return fn(*args)
+        except Exception:
+            pass
+    return [op, *args]
+
+
+def compile_skeleton(skel: Any) -> Callable[[List], Any]:
+    """
+    Compile a frozen skeleton into a builder function.
+
+    Args:
+        skel: Frozen skeleton (see freeze)
+
+    Returns:
+        A function ``build(bindings)`` equivalent to
+        ``rewriter.instantiate(thaw(skel), bindings)``
+    """
+    gen = _CodeGen()
+    body = _emit_build(gen, skel)
+    source = f"def _build(bindings):\n    return {body}\n"
+    namespace = dict(gen.consts, _evaluate=_rewriter.evaluate, _lookup=_rewriter.lookup,
+                     _resolve=_rewriter._resolve_op, _apply=_apply)
+    exec(source, namespace)
+    return namespace["_build"]
+
+
+def _literal_bit(atom: Any) -> int:
+    try:
+        return 1 << (hash(atom) & 63)
+    except TypeError:
+        return 0
+
+
+def literal_mask(pat: Any) -> int:
+    """
+    Return a 64-bit bloom mask of the literal atoms in a frozen pattern.
+
+    Pattern variables contribute nothing. An expression can only match if
+    its own mask (see expression_signature) has every bit of this one set.
+    """
+    if type(pat) is not tuple:
+        return _literal_bit(pat)
+    if pat and type(pat[0]) is str and pat[0] in _PATTERN_VARS:
+        return 0
+    mask = 0
+    for sub in pat:
+        mask |= literal_mask(sub)
+    return mask
+
+
+def pattern_depth(pat: Any) -> int:
+    """Return the nesting depth of a frozen pattern (variables are leaves)."""
+    if type(pat) is not tuple or not pat:
+        return 0
+    if type(pat[0]) is str and pat[0] in _PATTERN_VARS:
+        return 0
+    return 1 + max(pattern_depth(sub) for sub in pat)
+
+
+def expression_signature(exp: Any, max_depth: int) -> Tuple[int, int]:
+    """
+    Return the (literal mask, depth) of an expression, looking no deeper
+    than ``max_depth`` levels since no pattern literal sits below that.
+    """
+    if not isinstance(exp, list):
+        return _literal_bit(exp), 0
+    if max_depth == 0 or not exp:
+        return 0, 0
+    mask, depth = 0, 0
+    for sub in exp:
+        sub_mask, sub_depth = expression_signature(sub, max_depth - 1)
+        mask |= sub_mask
+        if sub_depth > depth:
+            depth = sub_depth
+    return mask, depth + 1
+
+
+def count_nodes(x: Any) -> int:
+    """
+    Count the nodes of a frozen pattern or skeleton.
+
+    Pattern variables and ``(":", form)`` substitutions count as a single
+    node, since their size is only known once bound.
+    """
+    if type(x) is not tuple or not x:
+        return 1
+    if type(x[0]) is str and (x[0] in _PATTERN_VARS or x[0] == ":"):
+        return 1
+    return sum(count_nodes(e) for e in x)
+
+
+class CompiledRule(NamedTuple):
+    """A rule prepared for the rewriter's matching loop."""
+    pattern: Any        # frozen pattern (first, so the indexes can read it)
+    match: Callable
+    build: Callable
+    rule: Any           # the rule as given, for logging
+    position: int       # index in the rule list, for first-match order
+    lits_mask: int
+    depth: int
+    cost: int           # estimated change in node count when applied
+
+
+def _guarded(match_rule: Callable, when: Callable) -> Callable:
+    """
+    Wrap a matcher with a side condition.
+
+    ``when`` is called with the bindings as a {name: value} dict and the
+    match only succeeds if it returns true, e.g. to keep a catch-all rule
+    from firing on its own output.
+    """
+    def _match(exp):
+        bindings = match_rule(exp)
+        if bindings is None or not when(dict(bindings)):
+            return None
+        return bindings
+
+    return _match
+
+
+def compile_rule(rule: Any, position: int) -> CompiledRule:
+    """
+    Freeze and compile a rule ([pattern, skeleton] or rich dict).
+
+    Args:
+        rule: The rule; a dict with "commute": True matches its binary
+            pattern in both argument orders, a "when" predicate is a side
+            condition on the bindings (see _guarded), and a "cost" entry
+            overrides the node-count estimate
+        position: Index of the rule in its rule list
+
+    Returns:
+        CompiledRule with matcher, builder, fast-reject signature and cost
+    """
+    frozen_pat = share(freeze(_rewriter.pattern(rule)))
+    frozen_skel = share(freeze(_rewriter.skeleton(rule)))
+    if isinstance(rule, dict) and "cost" in rule:
+        cost = rule["cost"]
+    else:
+        cost = count_nodes(frozen_skel) - count_nodes(frozen_pat)
+    if isinstance(rule, dict) and rule.get("commute"):
+        match_rule = compile_commutative_pattern(frozen_pat)
+    else:
+        match_rule = compile_pattern(frozen_pat)
+    if isinstance(rule, dict) and rule.get("when") is not None:
+        match_rule = _guarded(match_rule, rule["when"])
+    return CompiledRule(
+        pattern=frozen_pat,
+        match=match_rule,
+        build=compile_skeleton(frozen_skel),
+        rule=rule,
+        position=position,
+        lits_mask=literal_mask(frozen_pat),
+        depth=pattern_depth(frozen_pat),
+        cost=cost,
+    )
+
+
+def rule_variants(entry: CompiledRule) -> List[Any]:
+    """Return the frozen patterns a compiled rule can match, in match order."""
+    pat, rule = entry.pattern, entry.rule
+    if (isinstance(rule, dict) and rule.get("commute")
+            and type(pat) is tuple and len(pat) == 3):
+        return [pat, (pat[0], pat[2], pat[1])]
+    return [pat]
+
+
+# Decision tree nodes. A Switch inspects the subexpression at ``path`` and
+# follows the case for its constructor key (an atom, or _LIST_KEY plus the
+# arity of a list), falling back to ``default`` for anything else. A TryLeaf
+# holds the rules that survived every test on the way down, in rule order;
+# their matchers still run to check variables and the untested positions.
+class Switch(NamedTuple):
+    path: Tuple[int, ...]
+    cases: dict
+    default: Any
+
+
+class TryLeaf(NamedTuple):
+    rules: Tuple[CompiledRule, ...]
+
+
+_LIST_KEY = object()
+_NO_KEY = object()
+
+
+def _constructor(shape: dict, path: Tuple[int, ...]) -> Any:
+    """Return the case key a flattened pattern requires at path, or _NO_KEY."""
+    kind, value = shape.get(path, (WILD, None))
+    if kind == SUBPAT:
+        return (_LIST_KEY, value)
+    if kind == LITERAL:
+        return value
+    return _NO_KEY
+
+
+def _build_node(rows: List[Tuple[CompiledRule, dict]], frontier: List[Tuple[int, ...]]) -> Any:
+    # Pick the column to test: the first frontier path the first row has a
+    # constructor at (the "needed" column), else any path some row tests
+    column = None
+    if rows:
+        first = rows[0][1]
+        column = next((p for p in frontier if _constructor(first, p) is not _NO_KEY), None)
+        if column is None:
+            column = next((p for p in frontier
+                           if any(_constructor(shape, p) is not _NO_KEY for _, shape in rows)),
+                          None)
+    if column is None:
+        seen: Set[int] = set()
+        leaf = []
+        for entry, _ in rows:
+            if entry.position not in seen:
+                seen.add(entry.position)
+                leaf.append(entry)
+        return TryLeaf(tuple(leaf))
+
+    keys: Dict[Any, None] = {}
+    for _, shape in rows:
+        key = _constructor(shape, column)
+        if key is not _NO_KEY and (type(key) is tuple or isinstance(key, _ATOMS)):
+            keys.setdefault(key, None)
+
+    rest = [p for p in frontier if p != column]
+    cases = {}
+    for key in keys:
+        sub_rows = [(entry, shape) for entry, shape in rows
+                    if _constructor(shape, column) in (key, _NO_KEY)]
+        sub_frontier = rest
+        if type(key) is tuple:
+            sub_frontier = [column + (i,) for i in range(key[1])] + rest
+        cases[key] = _build_node(sub_rows, sub_frontier)
+    default_rows = [(entry, shape) for entry, shape in rows
+                    if _constructor(shape, column) is _NO_KEY]
+    return Switch(column, cases, _build_node(default_rows, rest))
+
+
+def _shapes(entry: CompiledRule) -> List[dict]:
+    """Return {path: (kind, value)} for each pattern variant of a rule."""
+    return [{path: (kind, value) for path, kind, value in pattern_paths(variant)}
+            for variant in rule_variants(entry)]
+
+
+def _atom_class(kind: int, value: Any) -> Optional[str]:
+    """Return the class of atoms ("list", "num" or "str") a shape entry admits, if only one."""
+    if kind == SUBPAT:
+        return "list"
+    if kind == WILD_CONST or (kind == LITERAL and isinstance(value, (int, float))):
+        return "num"
+    if kind == WILD_VAR or (kind == LITERAL and type(value) is str):
+        return "str"
+    return None
+
+
+def _shapes_disjoint(a: dict, b: dict) -> bool:
+    """True if no expression can match both flattened patterns (conservative)."""
+    for path, (kind, value) in a.items():
+        other = b.get(path)
+        if other is None:
+            continue
+        cls, other_cls = _atom_class(kind, value), _atom_class(*other)
+        if cls is not None and other_cls is not None and cls != other_cls:
+            return True
+        key, other_key = _constructor(a, path), _constructor(b, path)
+        if key is not _NO_KEY and other_key is not _NO_KEY and key != other_key:
+            return True
+    return False
+
+
+def _promote_leaf(rules: Tuple[CompiledRule, ...], hits: List[int], shapes: dict,
+                  disjoint: dict) -> Tuple[CompiledRule, ...]:
+    """
+    Order a leaf's rules by descending hit count without changing any result.
+
+    A rule only moves ahead of rules whose patterns are disjoint from its
+    own: at most one of those can match a given expression, so the first
+    match is the same in either order. Overlapping rules (and rules with
+    equal counts) keep their original order.
+    """
+    remaining = sorted(rules, key=lambda entry: entry.position)
+    order = []
+    while remaining:
+        # The first remaining rule is never blocked, so it is the fallback
+        best = 0
+        for i in range(1, len(remaining)):
+            entry = remaining[i]
+            if hits[entry.position] <= hits[remaining[best].position]:
+                continue
+            blocked = False
+            for earlier in remaining[:i]:
+                pair = (earlier.position, entry.position)
+                if pair not in disjoint:
+                    disjoint[pair] = all(_shapes_disjoint(a, b)
+                                         for a in shapes[pair[0]] for b in shapes[pair[1]])
+                if not disjoint[pair]:
+                    blocked = True
+                    break
+            if not blocked:
+                best = i
+        order.append(remaining.pop(best))
+    return tuple(order)
+
+
+class DecisionTree:
+    """
+    Rules compiled into a Maranget-style decision tree.
+
+    Instead of trying every rule against a node, the tree tests each
+    position of the expression that some pattern constrains (head,
+    arity, literal arguments) at most once and ends in a leaf listing
+    only the rules consistent with those tests, still in rule order.
+    """
+
+    __slots__ = ("root", "rules", "_disjoint")
+
+    def __init__(self, entries: List[CompiledRule]):
+        self.rules = list(entries)
+        rows = [(entry, shape) for entry in self.rules for shape in _shapes(entry)]
+        self.root = _build_node(rows, [()])
+        # Memo of pairwise pattern disjointness, filled in by promoted()
+        self._disjoint: Dict[Tuple[int, int], bool] = {}
+
+    def promoted(self, hits: List[int]) -> "DecisionTree":
+        """
+        Return a tree whose leaves try frequently matching rules first.
+
+        Args:
+            hits: Match counts indexed by rule position
+
+        Returns:
+            A tree that dispatches every expression to the same rule as
+            this one, with each leaf reordered by _promote_leaf (self if
+            no leaf changes)
+        """
+        shapes = {entry.position: _shapes(entry) for entry in self.rules}
+        changed = False
+
+        def reorder(node):
+            nonlocal changed
+            if type(node) is TryLeaf:
+                rules = _promote_leaf(node.rules, hits, shapes, self._disjoint)
+                if rules == node.rules:
+                    return node
+                changed = True
+                return TryLeaf(rules)
+            cases = {key: reorder(sub) for key, sub in node.cases.items()}
+            return Switch(node.path, cases, reorder(node.default))
+
+        root = reorder(self.root)
+        if not changed:
+            return self
+        tree = DecisionTree.__new__(DecisionTree)
+        tree.rules, tree.root, tree._disjoint = self.rules, root, self._disjoint
+        return tree
+
+    def candidates(self, exp: Any) -> Tuple[CompiledRule, ...]:
+        """Return the rules that could match exp, in original rule order."""
+        node = self.root
+        key: Any
+        while type(node) is Switch:
+            sub = exp
+            for i in node.path:
+                sub = sub[i]
+            if isinstance(sub, list):
+                key = (_LIST_KEY, len(sub))
+            elif isinstance(sub, _ATOMS):
+                key = sub
+            else:
+                key = _NO_KEY
+            node = node.cases.get(key, node.default)
+        return node.rules
+
+
+def compile_rules(rules: List[Any]) -> DecisionTree:
+    """Compile a rule list ([pattern, skeleton] pairs or dicts) into a DecisionTree."""
+    return DecisionTree([compile_rule(rule, position) for position, rule in enumerate(rules)])
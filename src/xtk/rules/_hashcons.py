@@ -0,0 +1,67 @@
+"""
+Hash-consed keys for expressions.
+
+The simplify memo looks up every compound node it visits. Keying it on
+nested tuples costs a full walk of the subtree to hash (tuples do not
+cache their hash) and another to compare on a hit. Here every node maps
+to a unique Term built from the Terms of its children, so equal subtrees
+share one Term: hashing is a cached int and equality is identity.
+
+The pool holds Terms weakly, so a Term lives only as long as some memo
+key (or a parent Term) still refers to it.
+"""
+
+import weakref
+from typing import Any, Tuple
+
+
+class Term:
+    """A hash-consed expression node; equal nodes are the same object."""
+
+    __slots__ = ("args", "_hash", "__weakref__")
+
+    def __init__(self, args: Tuple):
+        self.args = args
+        self._hash = hash(args)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"Term{self.args!r}"
+
+
+_POOL: "weakref.WeakValueDictionary[Tuple, Term]" = weakref.WeakValueDictionary()
+
+
+def atom_key(x: Any) -> Any:
+    """
+    Return the key for an atom.
+
+    Numbers are tagged with their type so that e.g. 1, 1.0 and True,
+    which compare equal but simplify to different results, get
+    distinct keys.
+    """
+    if type(x) is str:
+        return x
+    return (type(x), x)
+
+
+def cons(args: Tuple) -> Term:
+    """Return the unique Term whose children are ``args``."""
+    term = _POOL.get(args)
+    if term is None:
+        term = _POOL[args] = Term(args)
+    return term
+
+
+def term(exp: Any) -> Any:
+    """
+    Return the hash-consed key of an expression.
+
+    Lists become Terms (their args are the keys of the children, in
+    order); atoms become atom_key(). Raises TypeError for unhashable atoms.
+    """
+    if isinstance(exp, list):
+        return cons(tuple([term(e) for e in exp]))
+    return atom_key(exp)
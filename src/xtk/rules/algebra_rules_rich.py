@@ -6,59 +6,38 @@ to enable better explanations and educational features.
 """
 
 # Identity rules
+#
+# Rules marked "commute": True also match with the two arguments of their
+# binary pattern swapped, so one rule covers x + 0 and 0 + x.
 
-add_zero_right = {
+add_zero = {
     "pattern": ["+", ["?", "x"], 0],
     "skeleton": [":", "x"],
-    "name": "add-zero-right",
+    "commute": True,
+    "name": "add-zero",
     "description": "Adding zero to any expression doesn't change it (additive identity)",
     "category": "algebra-identity",
-    "examples": ["x + 0 = x", "5 + 0 = 5"]
+    "examples": ["x + 0 = x", "0 + x = x", "5 + 0 = 5"]
 }
 
-add_zero_left = {
-    "pattern": ["+", 0, ["?", "x"]],
-    "skeleton": [":", "x"],
-    "name": "add-zero-left",
-    "description": "Zero plus any expression equals the expression (additive identity)",
-    "category": "algebra-identity",
-    "examples": ["0 + x = x", "0 + 5 = 5"]
-}
-
-mult_one_right = {
+mult_one = {
     "pattern": ["*", ["?", "x"], 1],
     "skeleton": [":", "x"],
-    "name": "mult-one-right",
+    "commute": True,
+    "name": "mult-one",
     "description": "Multiplying any expression by one doesn't change it (multiplicative identity)",
     "category": "algebra-identity",
-    "examples": ["x·1 = x", "5·1 = 5"]
+    "examples": ["x·1 = x", "1·x = x", "5·1 = 5"]
 }
 
-mult_one_left = {
-    "pattern": ["*", 1, ["?", "x"]],
-    "skeleton": [":", "x"],
-    "name": "mult-one-left",
-    "description": "One times any expression equals the expression (multiplicative identity)",
-    "category": "algebra-identity",
-    "examples": ["1·x = x", "1·5 = 5"]
-}
-
-mult_zero_right = {
+mult_zero = {
     "pattern": ["*", ["?", "x"], 0],
     "skeleton": 0,
-    "name": "mult-zero-right",
+    "commute": True,
+    "name": "mult-zero",
     "description": "Multiplying any expression by zero gives zero",
     "category": "algebra-identity",
-    "examples": ["x·0 = 0", "100·0 = 0"]
-}
-
-mult_zero_left = {
-    "pattern": ["*", 0, ["?", "x"]],
-    "skeleton": 0,
-    "name": "mult-zero-left",
-    "description": "Zero times any expression gives zero",
-    "category": "algebra-identity",
-    "examples": ["0·x = 0", "0·100 = 0"]
+    "examples": ["x·0 = 0", "0·x = 0", "100·0 = 0"]
 }
 
 div_by_one = {
@@ -99,22 +78,14 @@ pow_zero = {
 
 # Distributive property
 
-distrib_left = {
+distrib = {
     "pattern": ["*", ["?", "a"], ["+", ["?", "x"], ["?", "y"]]],
     "skeleton": ["+", ["*", [":", "a"], [":", "x"]], ["*", [":", "a"], [":", "y"]]],
-    "name": "distributive-left",
-    "description": "Distribute multiplication over addition from the left: a·(x + y) = a·x + a·y",
-    "category": "algebra-distributive",
-    "examples": ["2(x + 3) = 2x + 6", "a(b + c) = ab + ac"]
-}
-
-distrib_right = {
-    "pattern": ["*", ["+", ["?", "x"], ["?", "y"]], ["?", "a"]],
-    "skeleton": ["+", ["*", [":", "x"], [":", "a"]], ["*", [":", "y"], [":", "a"]]],
-    "name": "distributive-right",
-    "description": "Distribute multiplication over addition from the right: (x + y)·a = x·a + y·a",
+    "commute": True,
+    "name": "distributive",
+    "description": "Distribute multiplication over addition: a·(x + y) = (x + y)·a = a·x + a·y",
     "category": "algebra-distributive",
-    "examples": ["(x + 3)·2 = x·2 + 3·2", "(b + c)·a = b·a + c·a"]
+    "examples": ["2(x + 3) = 2x + 6", "(b + c)·a = ab + ac"]
 }
 
 # FOIL (First, Outer, Inner, Last)
@@ -215,58 +186,48 @@ double_negative = {
 
 # Collect constants in nested operations
 
-collect_mult_const_right = {
+collect_mult_const = {
     "pattern": ["*", ["?c", "a"], ["*", ["?c", "b"], ["?v", "x"]]],
     "skeleton": ["*", ["*", [":", "a"], [":", "b"]], [":", "x"]],
-    "name": "collect-mult-const-right",
-    "description": "Collect constants in nested multiplication: a·(b·x) = (a·b)·x",
+    "commute": True,
+    "name": "collect-mult-const",
+    "description": "Collect constants in nested multiplication: a·(b·x) = (b·x)·a = (a·b)·x",
     "category": "algebra-collect",
-    "examples": ["2·(3·x) = 6·x", "5·(2·y) = 10·y"]
+    "examples": ["2·(3·x) = 6·x", "(5·y)·2 = 10·y"]
 }
 
-collect_mult_const_left = {
-    "pattern": ["*", ["*", ["?c", "a"], ["?v", "x"]], ["?c", "b"]],
-    "skeleton": ["*", ["*", [":", "a"], [":", "b"]], [":", "x"]],
-    "name": "collect-mult-const-left",
-    "description": "Collect constants in nested multiplication: (a·x)·b = (a·b)·x",
-    "category": "algebra-collect",
-    "examples": ["(2·x)·3 = 6·x", "(5·y)·2 = 10·y"]
-}
-
-collect_add_const_right = {
+collect_add_const = {
     "pattern": ["+", ["?c", "a"], ["+", ["?c", "b"], ["?v", "x"]]],
     "skeleton": ["+", ["+", [":", "a"], [":", "b"]], [":", "x"]],
-    "name": "collect-add-const-right",
-    "description": "Collect constants in nested addition: a+(b+x) = (a+b)+x",
+    "commute": True,
+    "name": "collect-add-const",
+    "description": "Collect constants in nested addition: a+(b+x) = (b+x)+a = (a+b)+x",
     "category": "algebra-collect",
-    "examples": ["2+(3+x) = 5+x", "10+(5+y) = 15+y"]
+    "examples": ["2+(3+x) = 5+x", "(10+y)+5 = 15+y"]
 }
 
-collect_add_const_left = {
-    "pattern": ["+", ["+", ["?c", "a"], ["?v", "x"]], ["?c", "b"]],
-    "skeleton": ["+", ["+", [":", "a"], [":", "b"]], [":", "x"]],
-    "name": "collect-add-const-left",
-    "description": "Collect constants in nested addition: (a+x)+b = (a+b)+x",
-    "category": "algebra-collect",
-    "examples": ["(2+x)+3 = 5+x", "(10+y)+5 = 15+y"]
-}
+# The left/right variants these rules replaced, kept as aliases so
+# existing imports still work (each rule now matches both operand orders)
+add_zero_right = add_zero_left = add_zero
+mult_one_right = mult_one_left = mult_one
+mult_zero_right = mult_zero_left = mult_zero
+distrib_left = distrib_right = distrib
+collect_mult_const_right = collect_mult_const_left = collect_mult_const
+collect_add_const_right = collect_add_const_left = collect_add_const
 
 # Export all simplification rules
 simplify_rules_rich = [
     # Identities
-    add_zero_right, add_zero_left,
-    mult_one_right, mult_one_left,
-    mult_zero_right, mult_zero_left,
+    add_zero, mult_one, mult_zero,
     div_by_one, zero_div_by_any,
     pow_one, pow_zero,
     # Distributive
-    distrib_left, distrib_right,
+    distrib,
     # Combining
     combine_like_terms,
     # Collect constants - TEMPORARILY DISABLED due to infinite loop with other rules
     # TODO: Fix interaction between collect rules and other algebra rules
-    # collect_mult_const_right, collect_mult_const_left,
-    # collect_add_const_right, collect_add_const_left,
+    # collect_mult_const, collect_add_const,
     # Powers
     power_of_power, mult_same_base, div_same_base,
     # Fractions
@@ -277,8 +238,8 @@ simplify_rules_rich = [
 
 # Constant collection rules (use separately to avoid loops with other rules)
 collect_const_rules_rich = [
-    collect_mult_const_right, collect_mult_const_left,
-    collect_add_const_right, collect_add_const_left,
+    collect_mult_const,
+    collect_add_const,
 ]
 
 # Separate associativity rules (use with caution - can cause loops with other rules)
@@ -289,8 +250,7 @@ assoc_rules_rich = [
 
 # Export expansion rules
 expand_rules_rich = [
-    distrib_left,
-    distrib_right,
+    distrib,
     foil_rule,
 ]
 
@@ -124,4 +124,14 @@ deriv_rules_fixed = [
     # d(arctan(x))/dx = 1/(1+x^2)
     [["dd", ["arctan", ["?v", "x"]], ["?v", "x"]],
      ["/", 1, ["+", 1, ["^", [":", "x"], 2]]]],
+
+    # Error function
+    # d(erf(x))/dx = 2/sqrt(pi) * exp(-x^2)
+    [["dd", ["erf", ["?v", "x"]], ["?v", "x"]],
+     ["*", ["/", 2, ["sqrt", "pi"]], ["exp", ["-", 0, ["^", [":", "x"], 2]]]]],
+
+    # d(erf(f))/dx = 2/sqrt(pi) * exp(-f^2) * f'
+    [["dd", ["erf", ["?", "f"]], ["?v", "v"]],
+     ["*", ["*", ["/", 2, ["sqrt", "pi"]], ["exp", ["-", 0, ["^", [":", "f"], 2]]]],
+           ["dd", [":", "f"], [":", "v"]]]],
 ]
\ No newline at end of file
@@ -8,13 +8,16 @@ to enable better explanations and educational features.
 
 # Basic derivative rules
 
+# One rule for d/dv(u) whether or not u is v, so a variable is matched
+# once instead of failing the u == v rule and retrying the u != v one
 var_rule = {
-    "pattern": ["dd", ["?v", "x"], ["?v", "x"]],
-    "skeleton": 1,
+    "pattern": ["dd", ["?v", "u"], ["?v", "v"]],
+    "skeleton": [":", ["kronecker-delta", "u", "v"]],
     "name": "derivative-of-variable",
-    "description": "The derivative of a variable with respect to itself is 1",
+    "description": ("The derivative of a variable is 1 with respect to itself "
+                    "and 0 with respect to any other variable"),
     "category": "calculus-basic",
-    "examples": ["d/dx(x) = 1", "d/dt(t) = 1"]
+    "examples": ["d/dx(x) = 1", "d/dt(t) = 1", "d/dx(y) = 0"]
 }
 
 constant_rule = {
@@ -26,15 +29,6 @@ constant_rule = {
     "examples": ["d/dx(5) = 0", "d/dx(π) = 0"]
 }
 
-different_var_rule = {
-    "pattern": ["dd", ["?v", "u"], ["?v", "v"]],
-    "skeleton": 0,
-    "name": "derivative-different-variable",
-    "description": "The derivative of one variable with respect to a different variable is 0",
-    "category": "calculus-basic",
-    "examples": ["d/dx(y) = 0", "d/dt(x) = 0"]
-}
-
 # Linear rules
 
 sum_rule = {
@@ -208,7 +202,6 @@ deriv_rules_rich = [
     # Basic
     var_rule,
     constant_rule,
-    different_var_rule,
     # Linear
     sum_rule,
     difference_rule,
@@ -234,7 +227,7 @@ deriv_rules_rich = [
 ]
 
 # Also export as individual groups for selective loading
-basic_deriv_rules = [var_rule, constant_rule, different_var_rule]
+basic_deriv_rules = [var_rule, constant_rule]
 linear_deriv_rules = [sum_rule, difference_rule, constant_multiple_rule]
 product_quotient_rules = [product_rule, quotient_rule]
 power_deriv_rules = [power_rule, general_power_rule]
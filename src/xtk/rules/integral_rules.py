@@ -1,3 +1,5 @@
+from typing import Any, Dict, Tuple
+
 # Integral rules
 integral_rules = [
     # Integral of a constant
@@ -50,6 +52,41 @@ integral_rules = [
      
 ]
 
+# Results of numerical integration, keyed by (integrand, a, b)
+_INT_CACHE: Dict[Tuple[Any, float, float], float] = {}
+
+# Sample count for the vectorized Simpson pass (odd, so 2^k intervals)
+_SIMPSON_POINTS = 1025
+_SIMPSON_RTOL = 1e-10
+
+
+def _integrate_vectorized(f, a, b):
+    """
+    Integrate f over [a, b] with one broadcast Simpson pass.
+
+    Returns None if f does not evaluate element-wise on a NumPy array to
+    finite values, or if halving the sample count changes the result
+    noticeably (a sign of a non-smooth integrand), so that the caller
+    can fall back to adaptive quadrature.
+    """
+    import numpy as np
+    from scipy.integrate import simpson
+
+    xs = np.linspace(a, b, _SIMPSON_POINTS)
+    try:
+        ys = np.asarray(f(xs), dtype=float)
+    except Exception:
+        return None
+    if ys.shape != xs.shape or not np.all(np.isfinite(ys)):
+        return None
+
+    fine = simpson(ys, x=xs)
+    coarse = simpson(ys[::2], x=xs[::2])
+    if abs(fine - coarse) > _SIMPSON_RTOL * max(1.0, abs(fine)):
+        return None
+    return float(fine)
+
+
 def integrate(f, a, b, env):
     from scipy.integrate import quad
 
@@ -60,9 +97,15 @@ def integrate(f, a, b, env):
     
     if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
         return "failed"
-    
-    if b < a:
-        return -quad(f, b, a)[0]
-    else:
-        return quad(f, a, b)[0]
-    
+
+    key = (f, a, b)
+    if key in _INT_CACHE:
+        return _INT_CACHE[key]
+
+    lo, hi, sign = (a, b, 1) if a <= b else (b, a, -1)
+    result = _integrate_vectorized(f, lo, hi)
+    if result is None:
+        result = quad(f, lo, hi)[0]
+
+    _INT_CACHE[key] = sign * result
+    return sign * result
@@ -3,8 +3,8 @@
 limit_rules = [
     # Limit of a constant
     # lim_x->c a = a
-    [["lim", ["->", ["?c", "a"], ["?v", "x"]], ["?c", "a"]],
-        [":", "a"]], 
+    [["lim", ["->", ["?v", "x"], ["?c", "c"]], ["?c", "a"]],
+        [":", "a"]],
     
     # Limit of a variable
     # lim_x->c x = c
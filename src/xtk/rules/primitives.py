@@ -1,26 +1,90 @@
 import math
+import operator as _op
 
-primitive_rules = [
-
-    # Simplification: addition by constants
-    [["+", ["?c", "c1"], ["?c", "c2"]], [":", lambda c1, c2: c1 + c2]],
-    # Simplification: multiplication by constants
-    [["*", ["?c", "c1"], ["?c", "c2"]], [":", lambda c1, c2: c1 * c2]],
-    # Simplification: subtraction by constants
-    [["-", ["?c", "c1"], ["?c", "c2"]], [":", lambda c1, c2: c1 - c2]],
-    # Simplification: division by constants
-    [["/", ["?c", "c1"], ["?c", "c2"]], [":", lambda c1, c2: c1 / c2]],
-    # Simplification: power of constants
-    [["^", ["?c", "c1"], ["?c", "c2"]], [":", lambda c1, c2: c1**c2]],
-    # Simplification: exponentiation of e
-    [["exp", ["?c", "c"]], [":", lambda c: math.exp(c)]],
-    # Simplification: logarithm of e
-    [["log", ["?c", "c"]], [":", lambda c: math.log(c)]],
-    # Simplification: sine of constants
-    [["sin", ["?c", "c"]], [":", lambda c: math.sin(c)]],
-    # Simplification: cosine of constants
-    [["cos", ["?c", "c"]], [":", lambda c: math.cos(c)]],
-    # Simplification: absolute value of constants
-    [["abs", ["?c", "c"]], [":", lambda c: abs(c)]],
-
-]
+# Constant folding is a table lookup on the head operator rather than a
+# list of [["+", ["?c", "c1"], ["?c", "c2"]], ...] rules run through the
+# generic matcher.
+
+# Binary operators on two numeric constants
+_CONST_FOLD = {
+    "+": _op.add,
+    "*": _op.mul,
+    "-": _op.sub,
+    "/": _op.truediv,
+    "^": _op.pow,
+}
+
+# Unary operators on one numeric constant
+_CONST_UNARY = {
+    "-": _op.neg,
+}
+
+# Functions of one numeric constant. Folding these turns exact symbolic
+# forms into floats (["sin", 1] becomes 0.8414...), so it is opt-in.
+_CONST_FUNCTIONS = {
+    "exp": math.exp,
+    "log": math.log,
+    "sin": math.sin,
+    "cos": math.cos,
+    "abs": abs,
+}
+
+
+def try_fold(expr, functions=False):
+    """
+    Evaluate an operator applied to numeric constants.
+
+    Args:
+        expr: Expression to fold, e.g. ["+", 2, 3]
+        functions: Also fold exp, log, sin, cos and abs of a constant
+            (default: False, which leaves them symbolic)
+
+    Returns:
+        The numeric result, or None if expr is not a foldable constant
+        expression (including division by zero, domain errors and complex
+        results)
+    """
+    if type(expr) is not list:
+        return None
+    n = len(expr)
+    if n == 3:
+        fn = _CONST_FOLD.get(expr[0]) if type(expr[0]) is str else None
+        if fn is None:
+            return None
+        a, b = expr[1], expr[2]
+        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+            return None
+        if fn is _op.truediv and b == 0:
+            return None
+    elif n == 2:
+        op = expr[0]
+        if type(op) is not str:
+            return None
+        fn = _CONST_UNARY.get(op)
+        if fn is None and functions:
+            fn = _CONST_FUNCTIONS.get(op)
+        if fn is None or not isinstance(expr[1], (int, float)):
+            return None
+        a, b = expr[1], None
+    else:
+        return None
+
+    try:
+        result = fn(a) if b is None else fn(a, b)
+    except (ArithmeticError, ValueError):
+        return None
+    # e.g. (-1) ** 0.5 is complex, which expressions cannot represent
+    return result if isinstance(result, (int, float)) else None
+
+
+def _kronecker_delta(u, v):
+    """Return 1 if u and v are the same, else 0."""
+    return 1 if u == v else 0
+
+
+# Functions a rule skeleton can call by name inside a ":" form, e.g.
+# [":", ["kronecker-delta", "u", "v"]], so such rule sets stay plain data
+# that can be saved as JSON or Lisp
+SKELETON_FUNCTIONS = {
+    "kronecker-delta": _kronecker_delta,
+}
@@ -1,26 +1,145 @@
 """Step logger for tracking expression rewriting transformations."""
 
 import json
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
-from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Union
+from datetime import datetime, timedelta
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 ExprType = Union[int, float, str, List[Any]]
 
+# Tells a background writer thread that the stream is finished
+_STOP = object()
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the json module handles them
+            pass
+    if pretty:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(',', ':')).encode()
+
 
 class StepLogger:
     """Logs expression rewriting steps to a file for visualization."""
     
-    def __init__(self, output_path: Optional[Union[str, Path]] = None):
+    def __init__(self, output_path: Optional[Union[str, Path]] = None,
+                 stream: bool = False, keep_in_memory: bool = True,
+                 background: bool = False):
         """Initialize the step logger.
         
         Args:
             output_path: Path to output file. If None, logs to 'rewrite_steps.json'
+            stream: Write each step to output_path as one JSON line as soon
+                as it is logged (JSONL, after a session header line),
+                instead of writing everything in save()
+            keep_in_memory: Also keep steps in self.steps; pass False with
+                stream=True so long sessions use constant memory
+            background: With stream=True, serialize and write steps on a
+                writer thread so logging only enqueues them; save() waits
+                for the queue to drain. Logged expressions must not be
+                mutated afterwards.
         """
         self.output_path = Path(output_path) if output_path else Path('rewrite_steps.json')
         self.steps: List[Dict[str, Any]] = []
-        self.session_id = datetime.now().isoformat()
+        self._start_session()
         self.step_count = 0
+        self.keep_in_memory = keep_in_memory
+        self.background = background
+        self._fh = None
+        self._queue = None
+        self._writer = None
+        self._writer_error: Optional[BaseException] = None
+        # Set once output_path holds a stream, which save() must not
+        # overwrite with a JSON document
+        self._streamed = False
+        if stream:
+            self._open_stream()
+
+    def _start_session(self):
+        # Steps record a monotonic clock reading (cheap, no formatting);
+        # the session id and ISO timestamps are derived from the session's
+        # start readings only when needed
+        self._start_wall_ns = time.time_ns()
+        self._start_ns = time.monotonic_ns()
+        self._session_id = None
+
+    def _wall_clock(self, monotonic_ns: int) -> datetime:
+        """Return the local time of a monotonic clock reading from this session."""
+        wall_ns = self._start_wall_ns + (monotonic_ns - self._start_ns)
+        return (datetime.fromtimestamp(wall_ns // 1_000_000_000)
+                + timedelta(microseconds=wall_ns % 1_000_000_000 // 1000))
+
+    @property
+    def session_id(self) -> str:
+        """ISO timestamp of the session start, formatted on first use."""
+        if self._session_id is None:
+            self._session_id = self._wall_clock(self._start_ns).isoformat()
+        return self._session_id
+
+    def _open_stream(self):
+        self._fh = open(self.output_path, 'wb', buffering=1 << 20)
+        self._streamed = True
+        header = {'session_id': self.session_id, 'timestamp_ns': self._start_ns}
+        self._fh.write(_dumps(header) + b'\n')
+        if self.background:
+            # A single consumer, so steps reach the file in logged order
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._drain, args=(self._queue, self._fh),
+                                            name='StepLogger-writer', daemon=True)
+            self._writer.start()
+
+    def _drain(self, steps: 'queue.SimpleQueue', fh):
+        """Writer thread: write queued steps to fh until _STOP arrives."""
+        while True:
+            step = steps.get()
+            if step is _STOP:
+                return
+            if self._writer_error is None:
+                try:
+                    fh.write(_dumps(step) + b'\n')
+                except Exception as e:
+                    # Keep draining so the closing join cannot hang; the
+                    # error is raised by _close_stream
+                    self._writer_error = e
+
+    def _close_stream(self):
+        """Flush and close the stream, waiting for a writer thread if any."""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._queue = self._writer = None
+        self._fh.close()
+        self._fh = None
+        error, self._writer_error = self._writer_error, None
+        if error is not None:
+            raise error
+
+    def _with_timestamp(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of step with its ISO 'timestamp' filled in."""
+        return {**step, 'timestamp': self._wall_clock(step['timestamp_ns']).isoformat()}
+
+    def _record(self, step: Dict[str, Any]):
+        """Store a step (in memory and/or on the stream) and advance the count."""
+        if self.keep_in_memory:
+            self.steps.append(step)
+        if self._queue is not None:
+            self._queue.put(step)
+        elif self._fh is not None:
+            self._fh.write(_dumps(step) + b'\n')
+        self.step_count += 1
     
     def log_initial(self, expression: ExprType, metadata: Optional[Dict[str, Any]] = None):
         """Log the initial expression.
@@ -29,14 +148,13 @@ class StepLogger:
             expression: The starting expression
             metadata: Optional metadata about the expression
         """
-        self.steps.append({
+        self._record({
             'step': self.step_count,
             'type': 'initial',
             'expression': expression,
             'metadata': metadata or {},
-            'timestamp': datetime.now().isoformat()
+            'timestamp_ns': time.monotonic_ns()
         })
-        self.step_count += 1
     
     def log_rewrite(self, 
                     before: ExprType,
@@ -55,7 +173,7 @@ class StepLogger:
             bindings: Variable bindings from pattern matching
             metadata: Optional metadata about the rewrite
         """
-        self.steps.append({
+        self._record({
             'step': self.step_count,
             'type': 'rewrite',
             'before': before,
@@ -66,9 +184,8 @@ class StepLogger:
             },
             'bindings': bindings or {},
             'metadata': metadata or {},
-            'timestamp': datetime.now().isoformat()
+            'timestamp_ns': time.monotonic_ns()
         })
-        self.step_count += 1
     
     def log_simplification(self,
                           before: ExprType,
@@ -83,16 +200,15 @@ class StepLogger:
             operation: Type of simplification (e.g., 'arithmetic', 'algebraic')
             metadata: Optional metadata
         """
-        self.steps.append({
+        self._record({
             'step': self.step_count,
             'type': 'simplification',
             'before': before,
             'after': after,
             'operation': operation,
             'metadata': metadata or {},
-            'timestamp': datetime.now().isoformat()
+            'timestamp_ns': time.monotonic_ns()
         })
-        self.step_count += 1
     
     def log_final(self, expression: ExprType, metadata: Optional[Dict[str, Any]] = None):
         """Log the final result.
@@ -101,42 +217,91 @@ class StepLogger:
             expression: The final expression
             metadata: Optional metadata
         """
-        self.steps.append({
+        self._record({
             'step': self.step_count,
             'type': 'final',
             'expression': expression,
             'metadata': metadata or {},
-            'timestamp': datetime.now().isoformat()
+            'timestamp_ns': time.monotonic_ns()
         })
-        self.step_count += 1
     
-    def save(self, output_path: Optional[Union[str, Path]] = None):
+    def save(self, output_path: Optional[Union[str, Path]] = None, pretty: bool = False):
         """Save the logged steps to a file.
+
+        The JSON is serialized in one go and written with a single call.
+        When streaming, saving to the default path just flushes and closes
+        the stream (after a background writer has written every step);
+        later saves to the default path leave the streamed file as is.
         
         Args:
             output_path: Optional alternative output path
+            pretty: Indent the JSON for reading (default: compact)
         """
+        if self._streamed and output_path is None:
+            # Streaming: every step is already on its way to output_path
+            if self._fh is not None:
+                self._close_stream()
+            return
+
         path = Path(output_path) if output_path else self.output_path
         
         output = {
             'session_id': self.session_id,
             'total_steps': self.step_count,
-            'steps': self.steps
+            'steps': [self._with_timestamp(step) for step in self.steps]
         }
         
-        with open(path, 'w') as f:
-            json.dump(output, f, indent=2)
+        path.write_bytes(_dumps(output, pretty))
     
+    def close(self):
+        """Flush and close the stream, if any; a no-op otherwise.
+
+        Call this (or use the logger as a context manager) when streaming
+        without a final save(): a background writer is a daemon thread, so
+        steps still queued when the process exits would be lost.
+        """
+        if self._fh is not None:
+            self._close_stream()
+
+    def __enter__(self) -> 'StepLogger':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
     def clear(self):
         """Clear all logged steps."""
         self.steps = []
         self.step_count = 0
-        self.session_id = datetime.now().isoformat()
+        self._start_session()
+        if self._fh is not None:
+            self._close_stream()
+            self._open_stream()
     
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the logged steps in place, without copying them.
+
+        Steps carry the raw 'timestamp_ns' reading; use get_steps() for
+        ISO timestamps.
+        """
+        return iter(self.steps)
+
+    def __len__(self) -> int:
+        """Number of steps held in memory."""
+        return len(self.steps)
+
+    def __bool__(self) -> bool:
+        # A logger is truthy even before its first step (callers test
+        # ``if step_logger:`` to decide whether to log)
+        return True
+
     def get_steps(self) -> List[Dict[str, Any]]:
-        """Get all logged steps.
+        """Get a snapshot of all logged steps.
+
+        The list and its step dicts are copies, safe to modify; iterate
+        over the logger instead to read steps without copying.
         
         Returns:
-            List of step dictionaries
+            List of step dictionaries, each with an ISO 'timestamp'
         """
-        return self.steps.copy()
\ No newline at end of file
+        return [self._with_timestamp(step) for step in self.steps]
\ No newline at end of file
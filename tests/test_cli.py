@@ -4,21 +4,121 @@ import unittest
 import os
 import sys
 import json
-import tempfile
-from unittest.mock import patch, MagicMock, mock_open, call
-from io import StringIO
-
+from argparse import Namespace
+from contextlib import ExitStack
+from copy import copy
+from itertools import count, takewhile
+from unittest.mock import patch, Mock, MagicMock, mock_open
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+from rich.table import Table
+
+from xtk import cli
 from xtk.cli import XTKRepl, main
+from xtk.fluent_api import Expression
+
+# Shared by tests that only display, evaluate or trace history. Not for
+# rewrite tests: rewrite_last() adds rules to the Expression in place.
+_SUM = Expression(['+', 1, 2])
+_PRODUCT = Expression(['*', 3, 4])
+_X_PLUS_ZERO = Expression(['+', 'x', 0])
+_X_PLUS_ONE = Expression(['+', 'x', 1])
+
+# Rules are never modified in place (only the REPL's rule list is), so
+# tests can share them
+_ADD_ZERO_RULE = [['+', ['?', 'x'], 0], [':', 'x']]
+_MUL_ONE_RULE = [['*', ['?', 'x'], 1], [':', 'x']]
+# Stands in for a RichRule where tests only count rich_rules
+_RICH_RULE = object()
+
+# Arguments of a bare `xtk` run, to build run_cli() arguments from
+_CLI_DEFAULTS = vars(cli._build_parser().parse_args([]))
+
+
+def setUpModule():
+    # Silence output once for the whole module; tests that check what is
+    # printed patch print themselves. REPLs built here never touch readline.
+    global _silenced, _template_repl
+    _silenced = ExitStack()
+    _silenced.enter_context(patch.dict(os.environ, XTK_NO_READLINE='1'))
+    _silenced.enter_context(patch('builtins.print', new=lambda *args, **kwargs: None))
+    _silenced.enter_context(patch.object(Console, 'print', new=lambda *args, **kwargs: None))
+    # The one REPL every ReplTestCase copies. Its console is a stub (the REPL
+    # only calls print on it), shared by the copies and reset before each test
+    with patch.object(cli, 'Console', return_value=MagicMock(spec=Console)):
+        _template_repl = XTKRepl()
+
+
+def tearDownModule():
+    _silenced.close()
+
+
+def _scripted_input(lines):
+    """Return an input() replacement that yields lines in turn (exceptions are raised)."""
+    it = iter(lines)
+
+    def scripted(prompt=''):
+        line = next(it)
+        if isinstance(line, BaseException):
+            raise line
+        return line
+    return scripted
+
+
+def _printed(mock, needle):
+    """True if some argument of some call to mock contains needle (stops at the first)."""
+    return any(needle in str(arg) for c in mock.call_args_list for arg in c.args)
+
+
+class _Contains:
+    """Matcher equal to any argument whose str() contains text (for assert_any_call)."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def __eq__(self, other):
+        return self.text in str(other)
+
+    def __repr__(self):
+        return f"<containing {self.text!r}>"
+
+
+def _last_printed(mock, needle):
+    """True if an argument of the last call to mock contains needle."""
+    return any(needle in str(arg) for arg in mock.call_args.args)
+
+
+class ReplTestCase(unittest.TestCase):
+    """
+    Base class for tests that need an XTKRepl.
+
+    The module builds one prototype REPL, and every test gets a copy of
+    it instead of constructing a new one. self.mock_print is the REPL
+    console's print, reset for each test.
+    """
+
+    def setUp(self):
+        """Copy the prototype REPL (fresh history, bindings, rules, variables...)."""
+        self.repl = XTKRepl.__new__(XTKRepl)
+        for name, value in vars(_template_repl).items():
+            setattr(self.repl, name, copy(value) if isinstance(value, (list, dict)) else value)
+        self.mock_print = self.repl.console.print
+        self.mock_print.reset_mock()
 
 
 class TestXTKReplInit(unittest.TestCase):
     """Test XTKRepl initialization."""
 
-    @patch('xtk.cli.readline')
-    @patch('xtk.cli.atexit')
-    def test_initialization(self, mock_atexit, mock_readline):
+    def test_initialization(self):
         """Test REPL initialization."""
-        repl = XTKRepl()
+        mock_readline, mock_atexit = MagicMock(), MagicMock()
+        with patch.dict(sys.modules, readline=mock_readline, atexit=mock_atexit), \
+                patch.dict(os.environ, XTK_NO_READLINE=''), \
+                patch.object(sys, 'stdin') as mock_stdin:
+            mock_stdin.isatty.return_value = True
+            repl = XTKRepl()
 
         # Check initial state
         self.assertEqual(repl.history, [])
@@ -31,16 +131,31 @@ class TestXTKReplInit(unittest.TestCase):
         mock_readline.set_completer.assert_called_once()
         mock_atexit.register.assert_called_once()
 
-
-class TestXTKReplComplete(unittest.TestCase):
+    def test_readline_skipped(self):
+        """Test readline is left alone when XTK_NO_READLINE is set or stdin is not a tty."""
+        mock_readline = MagicMock()
+        for tty, flag in [(True, '1'), (False, '')]:
+            with self.subTest(tty=tty, flag=flag), \
+                    patch.dict(sys.modules, readline=mock_readline), \
+                    patch.dict(os.environ, XTK_NO_READLINE=flag), \
+                    patch.object(sys, 'stdin') as mock_stdin:
+                mock_stdin.isatty.return_value = tty
+                XTKRepl()
+        mock_readline.set_completer.assert_not_called()
+
+    def test_no_stdin(self):
+        """Test the REPL can be built when sys.stdin is None (e.g. pythonw)."""
+        mock_readline = MagicMock()
+        with patch.dict(sys.modules, readline=mock_readline), \
+                patch.dict(os.environ, XTK_NO_READLINE=''), \
+                patch.object(sys, 'stdin', None):
+            XTKRepl()
+        mock_readline.set_completer.assert_not_called()
+
+
+class TestXTKReplComplete(ReplTestCase):
     """Test tab completion functionality."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_complete_commands(self):
         """Test command completion."""
         # Test completion for 'hel'
@@ -74,129 +189,66 @@ class TestXTKReplComplete(unittest.TestCase):
         self.repl.variables = {'x': None, 'xyz': None, 'y': None}
 
         # Variables should be included in completion options
-        options = []
-        i = 0
-        while True:
-            result = self.repl.complete('x', i)
-            if result is None:
-                break
-            options.append(result)
-            i += 1
+        options = self.repl.complete_all('x')
 
         # Should include both variables and commands starting with 'x'
         self.assertIn('x', options)
         self.assertIn('xyz', options)
 
+    def test_complete_collects_matches_once(self):
+        """Test matches are collected on state 0 and reused for later states."""
+        first = self.repl.complete('t', 0)
+        self.repl.variables = {'tt': None}
+        rest = takewhile(lambda option: option is not None,
+                         (self.repl.complete('t', state) for state in count(1)))
+        self.assertEqual([first, *rest], ['tree', 'trace', 'trace-explain'])
+        self.assertEqual(self.repl.complete('t', 3), None)
+        self.assertEqual(self.repl.complete('t', 0), 'tree')
+        self.assertEqual(self.repl.complete('t', 3), 'tt')
 
-class TestXTKReplRun(unittest.TestCase):
+
+class TestXTKReplRun(ReplTestCase):
     """Test REPL run loop."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
-    @patch('builtins.input', side_effect=['quit'])
-    def test_run_quit_command(self, mock_input):
-        """Test REPL quits on 'quit' command."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.run()
-
-            # Check goodbye message was printed
-            # The print may receive rich objects or strings
-            self.assertTrue(mock_print.called)
-            # At least one call should contain 'Goodbye' (in rich markup or plain text)
-            found_goodbye = False
-            for call in mock_print.call_args_list:
-                if call.args:
-                    arg_str = str(call.args[0])
-                    if 'Goodbye' in arg_str:
-                        found_goodbye = True
-                        break
-            self.assertTrue(found_goodbye, "Expected 'Goodbye' message not found")
-
-    @patch('builtins.input', side_effect=['exit'])
-    def test_run_exit_command(self, mock_input):
-        """Test REPL quits on 'exit' command."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.run()
-
-            # Check goodbye message was printed
-            found_goodbye = False
-            for call in mock_print.call_args_list:
-                if call.args:
-                    arg_str = str(call.args[0])
-                    if 'Goodbye' in arg_str:
-                        found_goodbye = True
-                        break
-            self.assertTrue(found_goodbye, "Expected 'Goodbye' message not found")
-
-    @patch('builtins.input', side_effect=['', 'quit'])
-    @patch('builtins.print')
-    def test_run_empty_line(self, mock_print, mock_input):
-        """Test REPL handles empty lines."""
+    def _run(self, lines):
+        """Run the REPL on scripted input lines; return the console.print mock."""
+        self.mock_print.reset_mock()
+        self.repl._input = _scripted_input(lines)
         self.repl.run()
-        # Should continue without error
-
-    def test_run_keyboard_interrupt(self):
-        """Test REPL handles KeyboardInterrupt."""
-        with patch('builtins.input', side_effect=[KeyboardInterrupt(), 'quit']):
-            with patch.object(self.repl.console, 'print') as mock_print:
-                self.repl.run()
-
-                # Check that a message about using quit was printed
-                found_message = False
-                for call in mock_print.call_args_list:
-                    if call.args:
-                        arg_str = str(call.args[0])
-                        if 'quit' in arg_str.lower() or 'exit' in arg_str.lower():
-                            found_message = True
-                            break
-                self.assertTrue(found_message, "Expected message about quit/exit not found")
-
-    @patch('builtins.input', side_effect=EOFError())
-    def test_run_eof_error(self, mock_input):
-        """Test REPL handles EOFError."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.run()
-
-            # Check goodbye message was printed
-            found_goodbye = False
-            for call in mock_print.call_args_list:
-                if call.args:
-                    arg_str = str(call.args[0])
-                    if 'Goodbye' in arg_str:
-                        found_goodbye = True
-                        break
-            self.assertTrue(found_goodbye, "Expected 'Goodbye' message not found")
-
-
-class TestXTKReplProcessing(unittest.TestCase):
-    """Test line and command processing."""
+        return self.mock_print
+
+    def test_run_messages(self):
+        """Test REPL messages on quit, exit, end of input, blank lines and Ctrl-C."""
+        cases = [
+            (['quit'], 'Goodbye'),
+            (['exit'], 'Goodbye'),
+            ([EOFError()], 'Goodbye'),
+            (['', 'quit'], 'Goodbye'),
+            # Ctrl-C keeps the REPL running and says how to leave
+            ([KeyboardInterrupt(), 'quit'], '/quit'),
+        ]
+        for lines, expected in cases:
+            with self.subTest(lines=lines):
+                # The print may receive rich objects or strings
+                self._run(lines).assert_any_call(_Contains(expected))
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
 
-    @patch('xtk.cli.Console.print')
-    def test_process_command_line(self, mock_print):
+class TestXTKReplProcessing(ReplTestCase):
+    """Test line and command processing."""
+
+    def test_process_command_line(self):
         """Test processing command lines starting with '/'."""
         with patch.object(self.repl, 'process_command') as mock_process_command:
             self.repl.process_line('/help')
             mock_process_command.assert_called_once_with('help')
 
-    @patch('xtk.cli.Console.print')
-    def test_process_variable_assignment(self, mock_print):
+    def test_process_variable_assignment(self):
         """Test processing variable assignments."""
         with patch.object(self.repl, 'set_variable') as mock_set_variable:
             self.repl.process_line('x = 42')
             mock_set_variable.assert_called_once_with('x', '42')
 
-    @patch('xtk.cli.Console.print')
-    def test_process_sexpr(self, mock_print):
+    def test_process_sexpr(self):
         """Test processing S-expressions."""
         self.repl.process_line('(+ 1 2)')
 
@@ -204,20 +256,18 @@ class TestXTKReplProcessing(unittest.TestCase):
         self.assertEqual(len(self.repl.history), 1)
 
         # Check output - should have printed the parsed expression
-        self.assertTrue(mock_print.called)
+        self.assertTrue(self.mock_print.called)
 
     def test_process_command_help(self):
         """Test help command."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.process_command('help')
+        self.repl.process_command('help')
 
-            # Should print a Markdown object
-            mock_print.assert_called_once()
-            from rich.markdown import Markdown
-            call_arg = mock_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Markdown)
-            # Check content is present
-            self.assertIn('Available Commands', call_arg.markup)
+        # Should print a Markdown object
+        self.mock_print.assert_called_once()
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Markdown)
+        # Check content is present
+        self.assertIn('Available Commands', call_arg.markup)
 
     @patch('os.system')
     def test_process_command_clear(self, mock_system):
@@ -228,213 +278,147 @@ class TestXTKReplProcessing(unittest.TestCase):
     def test_process_command_history(self):
         """Test history command."""
         # Add some history
-        from xtk.fluent_api import Expression
-        from rich.table import Table
-        self.repl.history = [Expression(['+', 1, 2])]
+        self.repl.history = [_SUM]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.process_command('history')
+        self.repl.process_command('history')
 
-            # Should print a Table object
-            mock_print.assert_called_once()
-            call_arg = mock_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Table)
+        # Should print a Table object
+        self.mock_print.assert_called_once()
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Table)
 
     def test_process_command_vars(self):
         """Test vars command."""
-        from xtk.fluent_api import Expression
-        from rich.table import Table
-        self.repl.variables = {'x': Expression(['+', 1, 2])}
+        self.repl.variables = {'x': _SUM}
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.process_command('vars')
+        self.repl.process_command('vars')
 
-            # Should print a Table object
-            mock_print.assert_called_once()
-            call_arg = mock_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Table)
+        # Should print a Table object
+        self.mock_print.assert_called_once()
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Table)
 
-    @patch('xtk.cli.Console.print')
-    def test_process_command_unknown(self, mock_print):
+    def test_process_command_unknown(self):
         """Test unknown command."""
         self.repl.process_command('unknown_command')
 
-        calls = [str(call) for call in mock_print.call_args_list]
-        self.assertTrue(any('Unknown command' in call for call in calls))
+        self.mock_print.assert_any_call(_Contains('Unknown command'))
 
 
-class TestXTKReplMethods(unittest.TestCase):
+class TestXTKReplMethods(ReplTestCase):
     """Test specific REPL methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_show_help(self):
         """Test show_help method."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.show_help()
-            # Should print a Markdown object
-            mock_console_print.assert_called_once()
-            # Check that it was called with a Markdown object (can't easily check content)
-            from rich.markdown import Markdown
-            call_arg = mock_console_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Markdown)
+        self.repl.show_help()
+        # Should print a Markdown object
+        self.mock_print.assert_called_once()
+        # Check that it was called with a Markdown object (can't easily check content)
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Markdown)
+
+    def test_show_help_parses_markdown_once(self):
+        """Test repeated help reuses the parsed Markdown."""
+        self.repl.show_help()
+        self.repl.show_help()
+        first, second = (c.args[0] for c in self.mock_print.call_args_list)
+        self.assertIs(first, second)
 
     def test_show_history_empty(self):
         """Test show_history with no history."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.show_history()
-            # Should print "No history yet" with yellow formatting
-            mock_console_print.assert_called_once()
-            call_args = str(mock_console_print.call_args)
-            self.assertIn("No history yet", call_args)
+        self.repl.show_history()
+        # Should print "No history yet" with yellow formatting
+        self.mock_print.assert_called_once()
+        self.assertTrue(_last_printed(self.mock_print, "No history yet"))
 
     def test_show_history_with_items(self):
         """Test show_history with items."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2]), Expression(['*', 3, 4])]
+        self.repl.history = [_SUM, _PRODUCT]
 
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.show_history()
-            # Should print a Table object
-            mock_console_print.assert_called_once()
-            from rich.table import Table
-            call_arg = mock_console_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Table)
+        self.repl.show_history()
+        # Should print a Table object
+        self.mock_print.assert_called_once()
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Table)
 
     def test_show_variables_empty(self):
         """Test show_variables with no variables."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.show_variables()
-            mock_console_print.assert_called_once()
-            call_args = str(mock_console_print.call_args)
-            self.assertIn("No variables defined", call_args)
+        self.repl.show_variables()
+        self.mock_print.assert_called_once()
+        self.assertTrue(_last_printed(self.mock_print, "No variables defined"))
 
     def test_show_variables_with_items(self):
         """Test show_variables with variables."""
-        from xtk.fluent_api import Expression
-        self.repl.variables = {'x': Expression(['+', 1, 2])}
+        self.repl.variables = {'x': _SUM}
 
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.show_variables()
-            mock_console_print.assert_called_once()
-            call_args = str(mock_console_print.call_args_list)
-            # Should show table with variable name
-            self.assertIn('x', call_args)
+        self.repl.show_variables()
+        self.mock_print.assert_called_once()
+        # Should show table with variable name
+        self.assertTrue(_printed(self.mock_print, 'x'))
 
     def test_set_variable_sexpr(self):
         """Test setting variable with S-expression."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.set_variable('x', '(+ 1 2)')
+        self.repl.set_variable('x', '(+ 1 2)')
 
-            self.assertIn('x', self.repl.variables)
-            call_args = str(mock_console_print.call_args_list)
-            self.assertIn('x', call_args)
-
-    def test_rewrite_last_no_history(self):
-        """Test rewrite_last with no history."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.rewrite_last()
-            call_args = str(mock_console_print.call_args)
-            self.assertIn("No expression", call_args)
+        self.assertIn('x', self.repl.variables)
+        self.assertTrue(_printed(self.mock_print, 'x'))
 
     def test_rewrite_last_with_history(self):
         """Test rewrite_last with history."""
-        from xtk.fluent_api import Expression
         self.repl.history = [Expression(['+', 'x', 0])]
-        self.repl.rules = [[['+', ['?', 'x'], 0], [':', 'x']]]
-
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.rewrite_last()
-            call_args = str(mock_console_print.call_args_list)
-            self.assertIn('Rewritten', call_args)
-            self.assertEqual(len(self.repl.history), 2)
+        self.repl.rules = [_ADD_ZERO_RULE]
 
-    def test_show_latex_no_history(self):
-        """Test show_latex with no history."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.show_latex()
-            call_args = str(mock_console_print.call_args)
-            self.assertIn("No expression", call_args)
+        self.repl.rewrite_last()
+        self.assertTrue(_printed(self.mock_print, 'Rewritten'))
+        self.assertEqual(len(self.repl.history), 2)
 
     def test_list_rules_empty(self):
         """Test list_rules with no rules."""
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.list_rules()
-            call_args = str(mock_console_print.call_args)
-            self.assertIn("No rules loaded", call_args)
+        self.repl.list_rules()
+        self.assertTrue(_last_printed(self.mock_print, "No rules loaded"))
 
     def test_list_rules_with_rules(self):
         """Test list_rules with rules."""
-        from rich.table import Table
-        self.repl.rules = [
-            [['+', ['?', 'x'], 0], [':', 'x']],
-            [['*', ['?', 'x'], 1], [':', 'x']]
-        ]
+        self.repl.rules = [_ADD_ZERO_RULE, _MUL_ONE_RULE]
 
-        with patch.object(self.repl.console, 'print') as mock_console_print:
-            self.repl.list_rules()
-            # Should print a table with rules
-            self.assertTrue(mock_console_print.called)
-            call_arg = mock_console_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Table)
+        self.repl.list_rules()
+        # Should print a table with rules
+        self.assertTrue(self.mock_print.called)
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Table)
 
 
-class TestXTKReplTreeVisualization(unittest.TestCase):
+class TestXTKReplTreeVisualization(ReplTestCase):
     """Test tree visualization methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_show_tree_with_history(self):
         """Test show_tree with expression in history."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 'x', 1])]
+        self.repl.history = [_X_PLUS_ONE]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_tree([])
-            # Should print the tree
-            mock_print.assert_called_once()
-
-    def test_show_tree_no_history(self):
-        """Test show_tree with empty history."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_tree([])
-            call_args = str(mock_print.call_args)
-            self.assertIn('No expression', call_args)
+        self.repl.show_tree([])
+        # Should print the tree
+        self.mock_print.assert_called_once()
 
     def test_show_tree_with_index(self):
         """Test show_tree with specific index."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2]), Expression(['*', 3, 4])]
+        self.repl.history = [_SUM, _PRODUCT]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_tree(['0'])
-            mock_print.assert_called_once()
+        self.repl.show_tree(['0'])
+        self.mock_print.assert_called_once()
 
     def test_show_tree_with_dollar_ref(self):
         """Test show_tree with $N reference."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2])]
+        self.repl.history = [_SUM]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_tree(['$0'])
-            mock_print.assert_called_once()
+        self.repl.show_tree(['$0'])
+        self.mock_print.assert_called_once()
 
     def test_show_tree_with_ans_ref(self):
         """Test show_tree with ans reference."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2])]
+        self.repl.history = [_SUM]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_tree(['ans'])
-            mock_print.assert_called_once()
+        self.repl.show_tree(['ans'])
+        self.mock_print.assert_called_once()
 
     def test_build_rich_tree_atom(self):
         """Test build_rich_tree with atom."""
@@ -452,172 +436,96 @@ class TestXTKReplTreeVisualization(unittest.TestCase):
         self.assertIsNotNone(tree)
 
 
-class TestXTKReplEvaluation(unittest.TestCase):
+class TestXTKReplEvaluation(ReplTestCase):
     """Test evaluation methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
-    def test_evaluate_with_bindings_no_history(self):
-        """Test evaluate_with_bindings with empty history."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.evaluate_with_bindings(['x=5'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('No expression', call_args)
-
     def test_evaluate_with_bindings_success(self):
         """Test successful evaluation with bindings."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 'x', 1])]
+        self.repl.history = [_X_PLUS_ONE]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.evaluate_with_bindings(['x=5'])
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Result', call_args)
+        self.repl.evaluate_with_bindings(['x=5'])
+        self.assertTrue(_printed(self.mock_print, 'Result'))
 
     def test_evaluate_with_invalid_binding(self):
         """Test evaluation with invalid binding."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 'x', 1])]
+        self.repl.history = [_X_PLUS_ONE]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.evaluate_with_bindings(['x=invalid_var'])
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Invalid binding', call_args)
+        self.repl.evaluate_with_bindings(['x=invalid_var'])
+        self.assertTrue(_printed(self.mock_print, 'Invalid binding'))
 
 
-class TestXTKReplConstantFolding(unittest.TestCase):
+class TestXTKReplConstantFolding(ReplTestCase):
     """Test constant folding toggle."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_toggle_constant_folding(self):
         """Test toggle_constant_folding."""
         # Default should be enabled
         self.assertTrue(self.repl.constant_folding_enabled)
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.toggle_constant_folding()
-            self.assertFalse(self.repl.constant_folding_enabled)
-            call_args = str(mock_print.call_args)
-            self.assertIn('disabled', call_args)
+        self.repl.toggle_constant_folding()
+        self.assertFalse(self.repl.constant_folding_enabled)
+        self.assertTrue(_last_printed(self.mock_print, 'disabled'))
 
-            self.repl.toggle_constant_folding()
-            self.assertTrue(self.repl.constant_folding_enabled)
+        self.repl.toggle_constant_folding()
+        self.assertTrue(self.repl.constant_folding_enabled)
 
 
-class TestXTKReplRenderAndLatex(unittest.TestCase):
+class TestXTKReplRenderAndLatex(ReplTestCase):
     """Test render and latex methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
-    def test_show_render_no_history(self):
-        """Test show_render with empty history."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_render()
-            call_args = str(mock_print.call_args)
-            self.assertIn('No expression', call_args)
-
     def test_show_render_with_history(self):
         """Test show_render with expression in history."""
-        from xtk.fluent_api import Expression
         self.repl.history = [Expression(['/', 'x', 2])]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_render()
-            mock_print.assert_called_once()
+        self.repl.show_render()
+        self.mock_print.assert_called_once()
 
     def test_show_latex_with_history(self):
         """Test show_latex with expression in history."""
-        from xtk.fluent_api import Expression
         self.repl.history = [Expression(['^', 'x', 2])]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_latex()
-            mock_print.assert_called_once()
+        self.repl.show_latex()
+        self.mock_print.assert_called_once()
 
 
-class TestXTKReplTrace(unittest.TestCase):
+class TestXTKReplTrace(ReplTestCase):
     """Test trace methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
-    def test_show_trace_no_history(self):
-        """Test show_trace with empty history."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_trace()
-            call_args = str(mock_print.call_args)
-            self.assertIn('No expression', call_args)
-
     def test_show_trace_no_rules(self):
         """Test show_trace with no rules."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 'x', 0])]
+        self.repl.history = [_X_PLUS_ZERO]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_trace()
-            call_args = str(mock_print.call_args)
-            self.assertIn('No rules', call_args)
+        self.repl.show_trace()
+        self.assertTrue(_last_printed(self.mock_print, 'No rules'))
 
     def test_show_trace_with_rules(self):
         """Test show_trace with rules loaded."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 'x', 0])]
-        self.repl.rules = [[['+', ['?', 'x'], 0], [':', 'x']]]
+        self.repl.history = [_X_PLUS_ZERO]
+        self.repl.rules = [_ADD_ZERO_RULE]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_trace()
-            # Should print initial, steps, and final
-            self.assertTrue(mock_print.called)
-
-    def test_show_trace_explain_no_history(self):
-        """Test show_trace_explain with empty history."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_trace_explain()
-            call_args = str(mock_print.call_args)
-            self.assertIn('No expression', call_args)
+        self.repl.show_trace()
+        # Should print the heading, then initial, steps, and final in one call
+        self.assertEqual(self.mock_print.call_count, 2)
+        trace = self.mock_print.call_args.args[0]
+        self.assertIn('Initial', trace)
+        self.assertIn('Rule', trace)
+        self.assertIn('Final', trace)
 
     def test_show_trace_explain_no_rules(self):
         """Test show_trace_explain with no rules."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 'x', 0])]
+        self.repl.history = [_X_PLUS_ZERO]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_trace_explain()
-            call_args = str(mock_print.call_args)
-            self.assertIn('No rules', call_args)
+        self.repl.show_trace_explain()
+        self.assertTrue(_last_printed(self.mock_print, 'No rules'))
 
 
-class TestXTKReplExplain(unittest.TestCase):
+class TestXTKReplExplain(ReplTestCase):
     """Test explain method."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_show_explain_no_rewrite(self):
         """Test show_explain with no rewrite."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_explain()
-            call_args = str(mock_print.call_args)
-            self.assertIn('No rewrite', call_args)
+        self.repl.show_explain()
+        self.assertTrue(_last_printed(self.mock_print, 'No rewrite'))
 
     def test_show_explain_with_rewrite_info(self):
         """Test show_explain with rewrite info."""
@@ -628,21 +536,14 @@ class TestXTKReplExplain(unittest.TestCase):
             'rule_description': 'x + 0 = x'
         }
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_explain()
-            # Should print the explanation
-            self.assertTrue(mock_print.called)
+        self.repl.show_explain()
+        # Should print the explanation
+        self.assertTrue(self.mock_print.called)
 
 
-class TestXTKReplRulesManagement(unittest.TestCase):
+class TestXTKReplRulesManagement(ReplTestCase):
     """Test rules management methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_handle_rules_command_no_args(self):
         """Test handle_rules_command with no args lists rules."""
         with patch.object(self.repl, 'list_rules') as mock_list:
@@ -657,147 +558,99 @@ class TestXTKReplRulesManagement(unittest.TestCase):
 
     def test_handle_rules_command_clear(self):
         """Test handle_rules_command with clear subcommand."""
-        self.repl.rules = [[['+', ['?', 'x'], 0], [':', 'x']]]
-        self.repl.rich_rules = [MagicMock()]
-
-        with patch.object(self.repl.console, 'print'):
-            self.repl.handle_rules_command(['clear'])
-            self.assertEqual(len(self.repl.rules), 0)
-            self.assertEqual(len(self.repl.rich_rules), 0)
-
-    def test_handle_rules_command_load_no_file(self):
-        """Test handle_rules_command load without filename."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['load'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('Usage', call_args)
-
-    def test_handle_rules_command_save_no_file(self):
-        """Test handle_rules_command save without filename."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['save'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('Usage', call_args)
-
-    def test_handle_rules_command_delete_no_index(self):
-        """Test handle_rules_command delete without index."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['delete'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('Usage', call_args)
-
-    def test_handle_rules_command_delete_invalid_index(self):
-        """Test handle_rules_command delete with invalid index."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['delete', 'abc'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('number', call_args)
-
-    def test_handle_rules_command_show_no_index(self):
-        """Test handle_rules_command show without index."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['show'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('Usage', call_args)
-
-    def test_handle_rules_command_show_invalid_index(self):
-        """Test handle_rules_command show with invalid index."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['show', 'abc'])
-            call_args = str(mock_print.call_args)
-            self.assertIn('number', call_args)
+        self.repl.rules = [_ADD_ZERO_RULE]
+        self.repl.rich_rules = [_RICH_RULE]
+
+        self.repl.handle_rules_command(['clear'])
+        self.assertEqual(len(self.repl.rules), 0)
+        self.assertEqual(len(self.repl.rich_rules), 0)
+
+    def test_load_rules(self):
+        """Test loading rules from a JSON file (read through a mocked open)."""
+        rules_data = [_ADD_ZERO_RULE]
+        with patch('pathlib.Path.exists', return_value=True), \
+                patch('builtins.open', mock_open(read_data=json.dumps(rules_data))):
+            self.repl.handle_rules_command(['load', 'fake.json'])
+        self.assertEqual(self.repl.rules, rules_data)
+        self.assertEqual(len(self.repl.rich_rules), 1)
+
+    def test_save_rules(self):
+        """Test saving rules writes them as JSON (to a mocked open)."""
+        self.repl.rules = [_MUL_ONE_RULE]
+        m = mock_open()
+        with patch('builtins.open', m):
+            self.repl.handle_rules_command(['save', 'fake.json'])
+        written = "".join(c.args[0] for c in m().write.call_args_list)
+        self.assertEqual(json.loads(written), self.repl.rules)
 
     def test_handle_rules_command_unknown(self):
         """Test handle_rules_command with unknown subcommand."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_command(['unknown'])
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Unknown subcommand', call_args)
+        self.repl.handle_rules_command(['unknown'])
+        self.assertTrue(_printed(self.mock_print, 'Unknown subcommand'))
 
     def test_handle_rules_add_no_skeleton(self):
         """Test handle_rules_add with missing skeleton."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_add('(+ (?v x) 0)')
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Usage', call_args)
+        self.repl.handle_rules_add('(+ (?v x) 0)')
+        self.assertTrue(_printed(self.mock_print, 'Usage'))
 
     def test_handle_rules_add_invalid_pattern(self):
         """Test handle_rules_add with invalid pattern."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.handle_rules_add('not-sexpr skeleton')
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Error', call_args)
+        self.repl.handle_rules_add('not-sexpr skeleton')
+        self.assertTrue(_printed(self.mock_print, 'Error'))
 
     def test_add_rule_success(self):
         """Test add_rule successfully adds a rule."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.add_rule('(+ (?v x) 0)', '(: x)')
-            self.assertEqual(len(self.repl.rules), 1)
-            self.assertEqual(len(self.repl.rich_rules), 1)
+        self.repl.add_rule('(+ (?v x) 0)', '(: x)')
+        self.assertEqual(len(self.repl.rules), 1)
+        self.assertEqual(len(self.repl.rich_rules), 1)
 
     def test_add_rule_invalid(self):
         """Test add_rule with invalid syntax."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.add_rule('invalid', 'syntax')
-            # Should print error
-            self.assertTrue(mock_print.called)
+        self.repl.add_rule('invalid', 'syntax')
+        # Should print error
+        self.assertTrue(self.mock_print.called)
 
     def test_delete_rule_success(self):
         """Test delete_rule successfully deletes a rule."""
-        self.repl.rules = [[['+', ['?', 'x'], 0], [':', 'x']]]
-        self.repl.rich_rules = [MagicMock()]
+        self.repl.rules = [_ADD_ZERO_RULE]
+        self.repl.rich_rules = [_RICH_RULE]
 
-        with patch.object(self.repl.console, 'print'):
-            self.repl.delete_rule(0)
-            self.assertEqual(len(self.repl.rules), 0)
+        self.repl.delete_rule(0)
+        self.assertEqual(len(self.repl.rules), 0)
 
     def test_delete_rule_invalid_index(self):
         """Test delete_rule with invalid index."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.delete_rule(99)
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Invalid index', call_args)
+        self.repl.delete_rule(99)
+        self.assertTrue(_printed(self.mock_print, 'Invalid index'))
 
     def test_show_rule_success(self):
         """Test show_rule shows rule details."""
-        from rich.table import Table
-        self.repl.rules = [[['+', ['?', 'x'], 0], [':', 'x']]]
+        self.repl.rules = [_ADD_ZERO_RULE]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_rule(0)
-            # Should print a table
-            mock_print.assert_called_once()
-            call_arg = mock_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Table)
+        self.repl.show_rule(0)
+        # Should print a table
+        self.mock_print.assert_called_once()
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Table)
 
     def test_show_rule_invalid_index(self):
         """Test show_rule with invalid index."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.show_rule(99)
-            call_args = str(mock_print.call_args_list)
-            self.assertIn('Invalid index', call_args)
+        self.repl.show_rule(99)
+        self.assertTrue(_printed(self.mock_print, 'Invalid index'))
 
 
-class TestXTKReplHistoryReference(unittest.TestCase):
+class TestXTKReplHistoryReference(ReplTestCase):
     """Test history reference methods."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_get_history_ref_ans(self):
         """Test get_history_ref with ans."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2])]
+        self.repl.history = [_SUM]
         result = self.repl.get_history_ref('ans')
         self.assertEqual(result.expr, ['+', 1, 2])
 
     def test_get_history_ref_dollar_valid(self):
         """Test get_history_ref with valid $N."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2]), Expression(['*', 3, 4])]
+        self.repl.history = [_SUM, _PRODUCT]
         result = self.repl.get_history_ref('$1')
         self.assertEqual(result.expr, ['*', 3, 4])
 
@@ -817,15 +670,9 @@ class TestXTKReplHistoryReference(unittest.TestCase):
         self.assertIsNone(result)
 
 
-class TestXTKReplProcessLine(unittest.TestCase):
+class TestXTKReplProcessLine(ReplTestCase):
     """Test process_line edge cases."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_process_line_comment(self):
         """Test process_line skips comments."""
         with patch.object(self.repl, 'process_command') as mock_cmd:
@@ -834,150 +681,144 @@ class TestXTKReplProcessLine(unittest.TestCase):
 
     def test_process_line_history_ref_valid(self):
         """Test process_line with valid history reference."""
-        from xtk.fluent_api import Expression
-        self.repl.history = [Expression(['+', 1, 2])]
+        self.repl.history = [_SUM]
 
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.process_line('ans')
-            call_args = str(mock_print.call_args)
-            self.assertIn('ans', call_args)
+        self.repl.process_line('ans')
+        self.assertTrue(_last_printed(self.mock_print, 'ans'))
 
     def test_process_line_history_ref_invalid(self):
         """Test process_line with invalid history reference."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.process_line('$99')
-            call_args = str(mock_print.call_args)
-            self.assertIn('Invalid reference', call_args)
+        self.repl.process_line('$99')
+        self.assertTrue(_last_printed(self.mock_print, 'Invalid reference'))
 
     def test_process_line_dsl_expression(self):
         """Test process_line with DSL expression."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.process_line('x + 1')
-            # Should be parsed and added to history
-            self.assertEqual(len(self.repl.history), 1)
+        self.repl.process_line('x + 1')
+        # Should be parsed and added to history
+        self.assertEqual(len(self.repl.history), 1)
 
     def test_process_line_parse_error(self):
         """Test process_line with parse error."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            # Unbalanced parentheses
-            self.repl.process_line('(+ 1 2')
-            call_args = str(mock_print.call_args)
-            self.assertIn('error', call_args.lower())
+        # Unbalanced parentheses
+        self.repl.process_line('(+ 1 2')
+        self.assertIn('error', str(self.mock_print.call_args.args[0]).lower())
+
+
+class TestXTKReplUsageMessages(ReplTestCase):
+    """Test commands that only report a problem with their input."""
+
+    def test_commands_need_an_expression(self):
+        """Test commands on an empty history report there is no expression."""
+        commands = [
+            ('rewrite_last', ()),
+            ('show_latex', ()),
+            ('show_tree', ([],)),
+            ('evaluate_with_bindings', (['x=5'],)),
+            ('show_render', ()),
+            ('show_trace', ()),
+            ('show_trace_explain', ()),
+        ]
+        for method, args in commands:
+            with self.subTest(method=method):
+                getattr(self.repl, method)(*args)
+                self.assertTrue(_last_printed(self.mock_print, 'No expression'))
+
+    def test_rules_command_argument_errors(self):
+        """Test /rules subcommands with missing or invalid arguments."""
+        cases = [
+            (['load'], 'Usage'),
+            (['save'], 'Usage'),
+            (['delete'], 'Usage'),
+            (['delete', 'abc'], 'number'),
+            (['show'], 'Usage'),
+            (['show', 'abc'], 'number'),
+        ]
+        for args, expected in cases:
+            with self.subTest(args=args):
+                self.repl.handle_rules_command(args)
+                self.assertTrue(_last_printed(self.mock_print, expected))
 
 
-class TestXTKReplWelcome(unittest.TestCase):
+class TestXTKReplWelcome(ReplTestCase):
     """Test welcome message."""
 
-    def setUp(self):
-        """Set up test REPL."""
-        with patch('xtk.cli.readline'):
-            with patch('xtk.cli.atexit'):
-                self.repl = XTKRepl()
-
     def test_print_welcome(self):
         """Test print_welcome prints welcome message."""
-        with patch.object(self.repl.console, 'print') as mock_print:
-            self.repl.print_welcome()
-            mock_print.assert_called_once()
-            from rich.panel import Panel
-            call_arg = mock_print.call_args[0][0]
-            self.assertIsInstance(call_arg, Panel)
+        self.repl.print_welcome()
+        self.mock_print.assert_called_once()
+        call_arg = self.mock_print.call_args[0][0]
+        self.assertIsInstance(call_arg, Panel)
 
 
 class TestMainFunction(unittest.TestCase):
     """Test the main CLI entry point."""
 
-    @patch('sys.argv', ['xtk'])
     def test_main_no_args_starts_repl(self):
         """Test main with no args starts REPL."""
-        with patch('xtk.cli.XTKRepl') as mock_repl_class:
-            mock_repl = MagicMock()
-            mock_repl_class.return_value = mock_repl
-
-            main()
+        mock_repl = Mock(spec=['run'])
+        with patch.object(cli, 'XTKRepl', return_value=mock_repl) as mock_repl_class:
+            main([])
 
             mock_repl_class.assert_called_once()
             mock_repl.run.assert_called_once()
 
     @patch('sys.argv', ['xtk', '-i'])
+    def test_main_defaults_to_sys_argv(self):
+        """Test main() without argv parses sys.argv with the shared parser."""
+        self.assertIs(cli._build_parser(), cli._build_parser())
+        mock_repl = Mock(spec=['run'])
+        with patch.object(cli, 'XTKRepl', return_value=mock_repl):
+            main()
+            mock_repl.run.assert_called_once()
+
     def test_main_interactive_flag(self):
         """Test main with -i flag starts REPL."""
-        with patch('xtk.cli.XTKRepl') as mock_repl_class:
-            mock_repl = MagicMock()
-            mock_repl_class.return_value = mock_repl
-
-            main()
+        mock_repl = Mock(spec=['run'])
+        with patch.object(cli, 'XTKRepl', return_value=mock_repl):
+            main(['-i'])
 
             mock_repl.run.assert_called_once()
 
-    @patch('sys.argv', ['xtk', '(+ 1 2)'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_sexpr(self, mock_print):
-        """Test main with S-expression."""
-        main()
-
-        # Should parse and print the expression
-        calls = [str(call) for call in mock_print.call_args_list]
-        self.assertTrue(len(calls) > 0)
-
-    @patch('sys.argv', ['xtk', '(+ 1 2)', '-f', 'latex'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_latex_format(self, mock_print):
-        """Test main with LaTeX format."""
-        main()
-
-        # Should output in LaTeX format
-        calls = mock_print.call_args_list
-        self.assertTrue(len(calls) > 0)
-
-    @patch('sys.argv', ['xtk', '(+ 1 2)', '-f', 'tree'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_tree_format(self, mock_print):
-        """Test main with tree format."""
-        main()
-
-        # Should output a Rich Tree
-        calls = mock_print.call_args_list
-        self.assertTrue(len(calls) > 0, "Console.print should be called for tree format")
-
-    @patch('sys.argv', ['xtk', '(+ x 0)', '-s'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_simplify(self, mock_print):
-        """Test main with simplify flag."""
-        main()
-
-        # Should simplify the expression
-        calls = mock_print.call_args_list
-        self.assertTrue(len(calls) > 0)
-
-    @patch('sys.argv', ['xtk', 'invalid expression'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_invalid_expression(self, mock_print):
-        """Test main with invalid expression."""
-        # "invalid expression" is actually valid - it's parsed as "invalid"
-        # The parser doesn't do error checking, so this just outputs "invalid"
-        main()
-        self.assertTrue(len(mock_print.call_args_list) > 0)
-
-    @patch('sys.argv', ['xtk', '(^ x 2)', '-d', 'x'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_differentiate(self, mock_print):
-        """Test main with differentiate flag."""
-        main()
-
-        # Should differentiate the expression
-        calls = mock_print.call_args_list
-        self.assertTrue(len(calls) > 0)
-
-    @patch('sys.argv', ['xtk', '(+ 1 2)', '-e'])
-    @patch('xtk.cli.Console.print')
-    def test_main_with_evaluate(self, mock_print):
-        """Test main with evaluate flag."""
-        main()
-
-        # Should evaluate the expression
-        calls = mock_print.call_args_list
-        self.assertTrue(len(calls) > 0)
+    def test_main_prints_result(self):
+        """Test main prints a result from the command line."""
+        with patch('xtk.cli.Console.print') as mock_print:
+            main(['(+ 1 2)', '-s'])
+        mock_print.assert_called_once()
+
+    def test_run_cli_prints_result(self):
+        """Test run_cli prints something for each output format and operation."""
+        cases = [
+            ('sexpr', {}),
+            ('latex', {'format': 'latex'}),
+            ('tree', {'format': 'tree'}),
+            ('simplify', {'expression': '(+ x 0)', 'simplify': True}),
+            # "invalid expression" is actually valid - it's parsed as "invalid"
+            ('invalid', {'expression': 'invalid expression'}),
+            ('differentiate', {'expression': '(^ x 2)', 'differentiate': 'x'}),
+            ('evaluate', {'evaluate': True}),
+        ]
+        with patch('xtk.cli.Console.print') as mock_print:
+            for name, options in cases:
+                with self.subTest(case=name):
+                    mock_print.reset_mock()
+                    cli.run_cli(Namespace(**{**_CLI_DEFAULTS, 'expression': '(+ 1 2)', **options}))
+                    self.assertTrue(mock_print.call_args_list)
+
+    def test_main_reports_parse_error(self):
+        """Test a malformed expression is reported and exits with status 1."""
+        with patch('xtk.cli.Console.print') as mock_print:
+            with self.assertRaises(SystemExit) as ctx:
+                main(['(+ 1'])
+        self.assertEqual(ctx.exception.code, 1)
+        self.assertIn('Error', mock_print.call_args[0][0])
+
+    def test_main_parses_repeated_expression_once(self):
+        """Test the same expression text is parsed once across runs."""
+        cli._parse_expression.cache_clear()
+        with patch.object(cli, 'parse_sexpr', wraps=cli.parse_sexpr) as mock_parse:
+            main(['(* 6 7)'])
+            main(['(* 6 7)', '-e'])
+        mock_parse.assert_called_once_with('(* 6 7)')
 
 
 if __name__ == '__main__':
@@ -100,10 +100,9 @@ class TestEdgeCases(unittest.TestCase):
         result_div = evaluate(expr_div, bindings)
         self.assertEqual(result_div, float('inf'))
     
-    @unittest.skip("User responsibility: avoid identity rules that cause infinite loops")
     def test_simplifier_infinite_loop_prevention(self):
         """
-        Test that simplifier doesn't get stuck in infinite loops.
+        Test that cyclic rules end in RecursionError instead of hanging.
 
         NOTE: Infinite loop prevention is the USER'S RESPONSIBILITY.
         Users must avoid writing rules that produce infinite rewrite cycles,
@@ -121,9 +120,10 @@ class TestEdgeCases(unittest.TestCase):
         simplify = simplifier(problematic_rules)
         expr = ['+', 'x', 'y']
 
-        # Should not hang - the improved simplifier has max iterations
-        result = simplify(expr)
-        self.assertIsNotNone(result)  # Just check it terminates
+        # There is no iteration limit: each rewrite's result is simplified
+        # recursively, so the cycle stops at the recursion limit
+        with self.assertRaises(RecursionError):
+            simplify(expr)
 
     @unittest.skip("User responsibility: place specific rules before general rules")
     def test_rule_order_sensitivity(self):
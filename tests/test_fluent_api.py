@@ -38,6 +38,19 @@ class TestExpression(unittest.TestCase):
         # __str__ and to_string
         self.assertEqual(str(expr), "(+ x y)")
         self.assertEqual(expr.to_string(), "(+ x y)")
+
+    def test_to_string_nested(self):
+        """Test to_string on empty, nested and very deep expressions."""
+        self.assertEqual(Expression([]).to_string(), "()")
+        self.assertEqual(Expression(5).to_string(), "5")
+        self.assertEqual(Expression(['f', [], ['g', ['h', 1.5]], 'y']).to_string(),
+                         "(f () (g (h 1.5)) y)")
+
+        deep = 'x'
+        for _ in range(5000):
+            deep = ['sin', deep]
+        self.assertEqual(Expression(deep).to_string(),
+                         "(sin " * 5000 + "x" + ")" * 5000)
     
     def test_equality(self):
         """Test equality comparison."""
@@ -0,0 +1,40 @@
+"""
+Tests for hash-consed expression keys.
+"""
+
+import unittest
+
+from xtk.rules._hashcons import Term, term, atom_key
+
+
+class TestHashCons(unittest.TestCase):
+    """Test that equal expressions map to one shared Term."""
+
+    def test_equal_expressions_share_term(self):
+        """Test structurally equal lists give the identical Term."""
+        a = term(['+', ['sin', 'x'], ['sin', 'x']])
+        b = term(['+', ['sin', 'x'], ['sin', 'x']])
+        self.assertIs(a, b)
+        self.assertIs(a.args[1], a.args[2])
+        self.assertIsInstance(a, Term)
+
+    def test_children_keys(self):
+        """Test a Term's args are the keys of the children in order."""
+        t = term(['*', 2, ['f', 'y']])
+        self.assertEqual(t.args[0], '*')
+        self.assertEqual(t.args[1], atom_key(2))
+        self.assertIs(t.args[2], term(['f', 'y']))
+
+    def test_numeric_types_distinct(self):
+        """Test 1, 1.0 and True get different keys."""
+        keys = {term(['f', 1]), term(['f', 1.0]), term(['f', True])}
+        self.assertEqual(len(keys), 3)
+
+    def test_unhashable_atom(self):
+        """Test unhashable atoms raise TypeError."""
+        with self.assertRaises(TypeError):
+            term(['f', {}])
+
+
+if __name__ == '__main__':
+    unittest.main()
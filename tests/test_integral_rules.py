@@ -0,0 +1,85 @@
+"""
+Tests for numerical integration in integral_rules.
+
+These need the optional numeric dependencies (pip install xpression-tk[numeric]).
+"""
+
+import math
+import unittest
+from unittest.mock import patch
+
+try:
+    import numpy as np
+    import scipy.integrate
+except ImportError:
+    np = None
+
+from xtk.rules.integral_rules import _INT_CACHE, _integrate_vectorized, integrate
+
+
+@unittest.skipUnless(np is not None, "requires numpy and scipy")
+class TestIntegrate(unittest.TestCase):
+    """Test the vectorized Simpson pass, its quad fallback and the cache."""
+
+    def setUp(self):
+        _INT_CACHE.clear()
+
+    def test_smooth_integrand_uses_simpson(self):
+        """Test an integrand that broadcasts over arrays never reaches quad."""
+        with patch.object(scipy.integrate, 'quad') as mock_quad:
+            result = integrate(np.sin, 0, math.pi, {})
+        self.assertAlmostEqual(result, 2.0, places=9)
+        mock_quad.assert_not_called()
+
+    def test_scalar_integrand_falls_back_to_quad(self):
+        """Test an integrand that only accepts scalars is integrated by quad."""
+        self.assertIsNone(_integrate_vectorized(math.sin, 0, math.pi))
+        with patch.object(scipy.integrate, 'quad', wraps=scipy.integrate.quad) as mock_quad:
+            result = integrate(math.sin, 0, math.pi, {})
+        self.assertAlmostEqual(result, 2.0, places=9)
+        mock_quad.assert_called_once()
+
+    def test_non_smooth_integrand_falls_back_to_quad(self):
+        """Test a coarse/fine Simpson mismatch hands the integral to quad."""
+        def step(x):
+            return np.where(x < 0.3, 0.0, 1.0)
+
+        self.assertIsNone(_integrate_vectorized(step, 0, 1))
+        with patch.object(scipy.integrate, 'quad', wraps=scipy.integrate.quad) as mock_quad:
+            result = integrate(step, 0, 1, {})
+        self.assertAlmostEqual(result, 0.7, places=6)
+        mock_quad.assert_called_once()
+
+    def test_non_finite_values_fall_back(self):
+        """Test a singular integrand is not integrated by Simpson."""
+        with np.errstate(divide='ignore'):
+            self.assertIsNone(_integrate_vectorized(lambda x: 1 / x, 0, 1))
+
+    def test_reversed_bounds(self):
+        """Test swapping the bounds negates the integral."""
+        self.assertAlmostEqual(integrate(np.sin, math.pi, 0, {}), -2.0, places=9)
+        self.assertAlmostEqual(integrate(math.sin, math.pi, 0, {}), -2.0, places=9)
+
+    def test_cache_hit(self):
+        """Test integrating the same function over the same bounds runs once."""
+        calls = []
+
+        def f(x):
+            calls.append(1)
+            return x * x
+
+        first = integrate(f, 0, 3, {})
+        self.assertEqual(integrate(f, 0, 3, {}), first)
+        self.assertEqual(len(calls), 1)
+        self.assertAlmostEqual(first, 9.0, places=9)
+        self.assertAlmostEqual(integrate(f, 3, 0, {}), -9.0, places=9)
+
+    def test_integrand_from_env(self):
+        """Test a named integrand is looked up, and bad input is rejected."""
+        self.assertAlmostEqual(integrate('f', 0, 1, {'f': np.exp}), math.e - 1, places=9)
+        self.assertEqual(integrate('f', 0, 1, {'f': 2}), "failed")
+        self.assertEqual(integrate(np.exp, 'a', 1, {}), "failed")
+
+
+if __name__ == '__main__':
+    unittest.main()
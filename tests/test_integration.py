@@ -9,6 +9,7 @@ import unittest
 import json
 import tempfile
 from pathlib import Path
+from unittest.mock import patch, mock_open
 
 from xtk import (
     Expression, E, parse_sexpr, format_sexpr,
@@ -370,13 +371,11 @@ class TestErrorHandling(unittest.TestCase):
         result = load_rules("((+ x 0) x)")
         self.assertEqual(len(result), 1)
         
-        # Invalid JSON
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            f.write("{invalid json}")
-            f.flush()
-            
+        # Invalid JSON (read through a mocked open, so no file is left behind)
+        with patch('pathlib.Path.exists', return_value=True), \
+                patch('builtins.open', mock_open(read_data="{invalid json}")):
             # Should fall back to trying S-expr parsing
-            result = load_rules(f.name)
+            result = load_rules("invalid.json")
             # Will get empty since it's not valid S-expr either
             self.assertEqual(result, [])
 
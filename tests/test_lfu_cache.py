@@ -0,0 +1,77 @@
+"""
+Tests for the LFU cache used to memoize rewrite results.
+"""
+
+import unittest
+
+from xtk.rules._cache import LFUCache
+
+
+class TestLFUCache(unittest.TestCase):
+    """Test LFU eviction and the mapping interface."""
+
+    def test_get_put(self):
+        """Test stored values are returned and missing keys give default."""
+        cache = LFUCache(capacity=2)
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('b', 0), 0)
+        self.assertIn('a', cache)
+
+    def test_evicts_least_frequent(self):
+        """Test the least used key is evicted when full."""
+        cache = LFUCache(capacity=2)
+        cache.put('hot', 1)
+        cache.put('cold', 2)
+        cache.get('hot')
+        cache.get('hot')
+        cache.put('new', 3)
+        self.assertIn('hot', cache)
+        self.assertNotIn('cold', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_ties_evict_oldest(self):
+        """Test equally frequent keys are evicted least recently used first."""
+        cache = LFUCache(capacity=2)
+        cache.put('first', 1)
+        cache.put('second', 2)
+        cache.put('third', 3)
+        self.assertNotIn('first', cache)
+        self.assertIn('second', cache)
+
+    def test_get_or_compute(self):
+        """Test compute only runs on a miss."""
+        cache = LFUCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'value'
+
+        self.assertEqual(cache.get_or_compute(('k',), compute), 'value')
+        self.assertEqual(cache.get_or_compute(('k',), compute), 'value')
+        self.assertEqual(len(calls), 1)
+
+    def test_many_accesses_stay_bounded(self):
+        """Test heavy reuse keeps both size and bookkeeping bounded."""
+        cache = LFUCache(capacity=3)
+        for i in range(1000):
+            cache.put(i % 5, i)
+            cache.get(0)
+        self.assertLessEqual(len(cache), 3)
+        self.assertIn(0, cache)
+        self.assertLessEqual(len(cache._heap), 4 * 3 + 1)
+
+    def test_clear_and_capacity(self):
+        """Test clear empties the cache and capacity must be positive."""
+        cache = LFUCache(capacity=1)
+        cache.put('a', 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        with self.assertRaises(ValueError):
+            LFUCache(capacity=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 """Test suite to improve parser.py coverage."""
 
+import sys
 import unittest
 from xtk.parser import (
     parse_sexpr, format_sexpr, tokenize, parse_atom, parse_dsl,
@@ -53,6 +54,13 @@ class TestParseAtom(unittest.TestCase):
         self.assertEqual(parse_atom("foo-bar"), "foo-bar")
         self.assertEqual(parse_atom("?x"), "?x")
 
+    def test_symbols_interned(self):
+        """Test equal symbols parse to the same interned string."""
+        a = parse_sexpr("(foo_bar x)")
+        b = DSLParser().parse("foo_bar(x)")
+        self.assertIs(a[0], b[0])
+        self.assertIs(a[0], sys.intern("foo_bar"))
+
 
 class TestParseSexpr(unittest.TestCase):
     """Test S-expression parsing."""
@@ -7,7 +7,7 @@ from xtk.rewriter import (
     atom, compound, constant, variable, empty_dictionary,
     extend_dictionary, lookup, arbitrary_constant,
     arbitrary_variable, arbitrary_expression, skeleton_evaluation,
-    eval_exp, pattern, skeleton, variable_name, null, cons
+    eval_exp, pattern, skeleton, variable_name, null, cons, clear_memo
 )
 
 # Disable debug logging for tests
@@ -502,5 +502,206 @@ class TestErrorConditions(unittest.TestCase):
         self.assertEqual(result, ['+', 1, 2])
 
 
+class TestSimplifyMemo(unittest.TestCase):
+    """Test memoization of simplified subexpressions."""
+
+    def setUp(self):
+        clear_memo()
+
+    def test_repeated_subterms_reduced_once(self):
+        """Test identical subtrees only hit the rules once."""
+        calls = []
+
+        def count(x):
+            calls.append(x)
+            return x
+
+        simplify = simplifier([[['f', ['?', 'x']], [':', [count, 'x']]]])
+        exp = ['+', ['f', ['g', 'a']], ['f', ['g', 'a']]]
+        self.assertEqual(simplify(exp), ['+', ['g', 'a'], ['g', 'a']])
+        self.assertEqual(len(calls), 1)
+
+    def test_equal_rule_sets_share_memo(self):
+        """Test a fresh rewriter over the same rules reuses earlier results."""
+        calls = []
+
+        def count(x):
+            calls.append(x)
+            return x
+
+        rules = [[['f', ['?', 'x']], [':', [count, 'x']]]]
+        exp = ['+', ['f', 'a'], 'b']
+        simplifier(rules)(exp)
+        simplifier([list(rule) for rule in rules])(exp)
+        self.assertEqual(len(calls), 1)
+        simplifier(rules, constant_folding=False)(exp)
+        self.assertEqual(len(calls), 2)
+
+    def test_numeric_types_kept_distinct(self):
+        """Test equal numbers of different types are not conflated."""
+        simplify = simplifier([[['id', ['?', 'x']], [':', 'x']]])
+        self.assertIsInstance(simplify(['id', 1]), int)
+        self.assertIsInstance(simplify(['id', 1.0]), float)
+
+    def test_frozen_rules_keep_numeric_types_distinct(self):
+        """Test tuple rules differing only in 0 vs 0.0 do not share memo entries."""
+        self.assertIs(type(simplifier([(('f', 'x'), 0)])(['f', 'x'])), int)
+        self.assertIs(type(simplifier([(('f', 'x'), 0.0)])(['f', 'x'])), float)
+
+    def test_results_are_independent(self):
+        """Test cached results are fresh lists on every call."""
+        simplify = simplifier([[['wrap', ['?', 'x']], ['box', [':', 'x']]]])
+        first = simplify(['wrap', 'a'])
+        first.append('mutated')
+        self.assertEqual(simplify(['wrap', 'a']), ['box', 'a'])
+
+
+class TestBottomUpTraversal(unittest.TestCase):
+    """Test that children are simplified before their parent."""
+
+    def test_children_rewritten_first(self):
+        """Test rewrite steps are logged in post-order."""
+        from xtk.step_logger import StepLogger
+        logger = StepLogger()
+        rules = [
+            [['*', 0, ['?', 'x']], 0],
+            [['+', 0, ['?', 'x']], [':', 'x']],
+        ]
+        simplify = simplifier(rules, step_logger=logger)
+        result = simplify(['+', ['*', 0, 'y'], ['*', 0, 'z']])
+        self.assertEqual(result, 0)
+        befores = [s['before'] for s in logger.get_steps() if s['type'] == 'rewrite']
+        self.assertEqual(befores, [['*', 0, 'y'], ['*', 0, 'z'], ['+', 0, 0]])
+
+    def test_children_simplified_even_under_absorbing_parent(self):
+        """Test children are reduced before a parent rule like 0 * x => 0 is tried.
+
+        A top-down pass returned 1 and 0 here; bottom up, the subtraction
+        rule keeps rewriting (- 0 y) inside the child and never finishes.
+        """
+        from xtk.rules.algebra_rules import simplify_rules
+        simplify = simplifier(simplify_rules)
+        for exp in (['^', ['-', ['^', 3, 'y'], 3], 0], ['*', 0, ['-', -1, ['^', 0.5, 0.5]]]):
+            with self.subTest(expression=exp):
+                with self.assertRaises(RecursionError):
+                    simplify(exp)
+
+    def test_constant_folding_single_sweep(self):
+        """Test nested arithmetic folds upward in one post-order pass."""
+        simplify = simplifier([])
+        self.assertEqual(simplify(['+', ['*', 2, 3], ['-', 10, ['/', 8, 2]]]), 12)
+
+
+class TestConstantFolding(unittest.TestCase):
+    """Test the constant-folding dispatch table."""
+
+    def test_try_fold(self):
+        """Test binary and unary folds on numeric constants."""
+        from xtk.rules.primitives import try_fold
+        self.assertEqual(try_fold(['+', 2, 3]), 5)
+        self.assertEqual(try_fold(['^', 2, 10]), 1024)
+        self.assertEqual(try_fold(['-', 4]), -4)
+        self.assertEqual(try_fold(['cos', 0], functions=True), 1.0)
+        self.assertEqual(try_fold(['abs', -2.5], functions=True), 2.5)
+
+    def test_try_fold_declines(self):
+        """Test non-constant, unknown and undefined cases are left alone."""
+        from xtk.rules.primitives import try_fold
+        self.assertIsNone(try_fold(['+', 'x', 3]))
+        self.assertIsNone(try_fold(['max', 1, 2]))
+        self.assertIsNone(try_fold(['/', 1, 0]))
+        self.assertIsNone(try_fold(['log', 0], functions=True))
+        self.assertIsNone(try_fold(['sin', 1]))
+        self.assertIsNone(try_fold(['^', -1, 0.5]))
+        self.assertIsNone(try_fold(['+', 1, 2, 3]))
+        self.assertIsNone(try_fold(5))
+
+    def test_complex_powers_stay_symbolic(self):
+        """Test a negative base with a fractional exponent is not folded."""
+        from xtk.rules.algebra_rules_rich import simplify_rules_rich
+        simplify = simplifier(simplify_rules_rich)
+        self.assertEqual(simplify(['^', -1, 0.5]), ['^', -1, 0.5])
+        self.assertEqual(simplify(['+', ['^', -1, -1], ['^', -1, 0.5]]),
+                         ['+', -1.0, ['^', -1, 0.5]])
+
+    def test_fold_disabled(self):
+        """Test constant_folding=False leaves arithmetic untouched."""
+        self.assertEqual(simplifier([], constant_folding=False)(['+', 2, 3]), ['+', 2, 3])
+
+    def test_functions_stay_symbolic(self):
+        """Test exp/log/sin/cos/abs of constants only fold with fold_functions."""
+        self.assertEqual(simplifier([])(['sin', 1]), ['sin', 1])
+        self.assertEqual(simplifier([])(['exp', 0]), ['exp', 0])
+        self.assertAlmostEqual(simplifier([], fold_functions=True)(['sin', 1]), 0.8414709848)
+
+    def test_rules_before_folding(self):
+        """Test an exact rule result wins over the folded float."""
+        simplify = simplifier([[['^', 1, ['?', 'x']], 1]])
+        result = simplify(['^', 1, 0.5])
+        self.assertEqual(result, 1)
+        self.assertIs(type(result), int)
+
+
+class TestCanonicalOrder(unittest.TestCase):
+    """Test canonical argument order for commutative operators."""
+
+    def test_canonicalize_node(self):
+        """Test numbers move to the front of + and * only."""
+        from xtk.rules._canonical import canonicalize_node
+        self.assertEqual(canonicalize_node(['*', 'x', 3]), ['*', 3, 'x'])
+        self.assertEqual(canonicalize_node(['-', 'x', 3]), ['-', 'x', 3])
+        self.assertEqual(canonicalize_node(['+', 'y', 'x']), ['+', 'y', 'x'])
+
+    def test_canonicalize_pattern(self):
+        """Test ?c variables are treated like numbers in patterns."""
+        from xtk.rules._canonical import canonicalize_pattern
+        self.assertEqual(canonicalize_pattern(['*', ['?', 'x'], ['?c', 'c']]),
+                         ['*', ['?c', 'c'], ['?', 'x']])
+        self.assertEqual(canonicalize_pattern(['+', ['?', 'x'], 0]), ['+', 0, ['?', 'x']])
+
+    def test_rewriter_matches_either_order(self):
+        """Test combine-like-terms fires regardless of operand order."""
+        rules = [[['+', ['*', ['?c', 'a'], ['?', 'x']], ['*', ['?c', 'b'], ['?', 'x']]],
+                  ['*', [':', ['+', 'a', 'b']], [':', 'x']]]]
+        expr = ['+', ['*', 'x', 3], ['*', 5, 'x']]
+        self.assertEqual(simplifier(rules, canonical_order=True)(expr), ['*', 8, 'x'])
+        self.assertEqual(simplifier(rules)(expr), expr)
+
+
+class TestPreferReducing(unittest.TestCase):
+    """Test choosing the most reducing rule instead of the first match."""
+
+    RULES = [
+        [['*', ['?', 'a'], ['+', ['?', 'x'], ['?', 'y']]],
+         ['+', ['*', [':', 'a'], [':', 'x']], ['*', [':', 'a'], [':', 'y']]]],
+        [['*', 0, ['?', 'x']], 0],
+    ]
+
+    def rewrites(self, **kwargs):
+        from xtk.step_logger import StepLogger
+        logger = StepLogger()
+        result = simplifier(self.RULES, step_logger=logger, **kwargs)(['*', 0, ['+', 'a', 'b']])
+        self.assertEqual(result, 0)
+        return [s for s in logger.get_steps() if s['type'] == 'rewrite']
+
+    def test_first_match_by_default(self):
+        """Test the earlier (expanding) rule wins by default."""
+        self.assertGreater(len(self.rewrites()), 1)
+
+    def test_prefer_reducing(self):
+        """Test the collapsing rule is chosen when preferring reductions."""
+        steps = self.rewrites(prefer_reducing=True)
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(steps[0]['after'], 0)
+
+    def test_rule_cost_estimate(self):
+        """Test the node-count cost estimate and dict override."""
+        from xtk.rules._compile import compile_rule
+        self.assertEqual(compile_rule(self.RULES[1], 0).cost, -2)
+        self.assertGreater(compile_rule(self.RULES[0], 0).cost, 0)
+        rule = {'pattern': ['*', 0, ['?', 'x']], 'skeleton': 0, 'cost': 5}
+        self.assertEqual(compile_rule(rule, 0).cost, 5)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,311 @@
+"""
+Tests for the compiled (frozen) rule representation.
+"""
+
+import unittest
+
+from xtk.rewriter import match, instantiate, empty_dictionary
+from xtk.rules._compile import (
+    freeze, thaw,
+    compile_pattern, compile_skeleton,
+    literal_mask, pattern_depth, expression_signature, compile_rule,
+    pattern_paths, WILD, WILD_CONST, LITERAL, SUBPAT, share, match_strategy,
+    compile_rules, Switch, pattern_key,
+)
+from xtk.rules._codegen import compile_candidates
+
+
+def first_match(candidates, exp):
+    """Return (rule index, bindings) for the first candidate matching exp."""
+    return next(((entry.position, bindings) for entry in candidates(exp)
+                 if (bindings := entry.match(exp)) is not None), None)
+
+
+class TestFreeze(unittest.TestCase):
+    """Test freezing rules into tuples."""
+
+    def test_freeze_nested(self):
+        """Test lists become tuples at every level."""
+        frozen = freeze(['+', ['?', 'x'], 0])
+        self.assertEqual(frozen, ('+', ('?', 'x'), 0))
+        self.assertIsInstance(frozen[1], tuple)
+
+    def test_freeze_interns_symbols(self):
+        """Test symbols are interned so equal names share one object."""
+        name = ''.join(['long_', 'variable_', 'name'])
+        self.assertIs(freeze([name])[0], freeze(['long_variable_name'])[0])
+
+    def test_frozen_is_hashable(self):
+        """Test frozen patterns can be used as dict keys."""
+        self.assertEqual({freeze(['*', ['?', 'x'], 1]): 1}[('*', ('?', 'x'), 1)], 1)
+
+    def test_share_identical_subtrees(self):
+        """Test equal frozen subtrees become one object, keeping types apart."""
+        a = share(freeze(['+', [':', 'x'], ['^', [':', 'g'], 2]]))
+        b = share(freeze(['*', ['^', [':', 'g'], 2], [':', 'x']]))
+        self.assertIs(a[1], b[2])
+        self.assertIs(a[2], b[1])
+        self.assertIsInstance(share(freeze([':', 1.0]))[1], float)
+        self.assertIsInstance(share(freeze([':', 1]))[1], int)
+
+    def test_rewriter_accepts_frozen_rules(self):
+        """Test rules given as frozen tuples rewrite like their list form."""
+        from xtk.rewriter import rewriter
+        from xtk.rules.deriv_rules import deriv_rules_fixed
+        exp = ['dd', ['*', ['sin', 'x'], ['^', 'x', 2]], 'x']
+        frozen = [freeze(rule) for rule in deriv_rules_fixed]
+        self.assertIsInstance(frozen[0], tuple)
+        self.assertEqual(rewriter(frozen)(exp), rewriter(deriv_rules_fixed)(exp))
+        self.assertEqual(rewriter(frozen, canonical_order=True)(exp),
+                         rewriter(deriv_rules_fixed, canonical_order=True)(exp))
+
+    def test_thaw_roundtrip(self):
+        """Test thawing restores the original nested lists."""
+        rule = [['dd', ['?c', 'c'], ['?v', 'v']], 0]
+        self.assertEqual(thaw(freeze(rule)), rule)
+
+
+class TestCompiledRules(unittest.TestCase):
+    """Test generated matcher/builder functions agree with the interpreter."""
+
+    CASES = [
+        (['+', ['?', 'x'], 0], ['+', 'y', 0]),
+        (['+', ['?', 'x'], 0], ['+', 'y', 1]),
+        (['+', ['?', 'x'], ['?', 'x']], ['+', 'y', 'y']),
+        (['+', ['?', 'x'], ['?', 'x']], ['+', 'y', 'z']),
+        (['dd', ['?c', 'c'], ['?v', 'v']], ['dd', 5, 'x']),
+        (['dd', ['?c', 'c'], ['?v', 'v']], ['dd', 'y', 'x']),
+        (['dd', ['?v', 'x'], ['?v', 'x']], ['dd', 'x', 'x']),
+        (['sin', ['?', 'x']], ['sin', ['+', 'a', 'b']]),
+        (['sin', ['?', 'x']], ['sin', 'a', 'b']),
+        (['sin', ['?', 'x']], 'sin'),
+        ('pi', 'pi'),
+        ('pi', ['pi']),
+        (['?', 'f'], print),
+    ]
+
+    def test_compiled_matcher_agrees_with_match(self):
+        """Test each case produces the same bindings as match()."""
+        for pat, exp in TestCompiledRules.CASES:
+            with self.subTest(pattern=pat, expression=exp):
+                expected = match(pat, exp, empty_dictionary())
+                result = compile_pattern(freeze(pat))(exp)
+                self.assertEqual("failed" if result is None else result, expected)
+
+    def test_pattern_paths(self):
+        """Test patterns flatten to pre-order (path, kind, value) entries."""
+        self.assertEqual(pattern_paths(freeze(['*', ['?', 'a'], ['+', ['?c', 'x'], 1]])), [
+            ((), SUBPAT, 3), ((0,), LITERAL, '*'), ((1,), WILD, 'a'),
+            ((2,), SUBPAT, 3), ((2, 0), LITERAL, '+'), ((2, 1), WILD_CONST, 'x'),
+            ((2, 2), LITERAL, 1),
+        ])
+        self.assertEqual(pattern_paths('pi'), [((), LITERAL, 'pi')])
+
+    def test_shape_first_matchers(self):
+        """Test broad patterns are matched shape-first with the same bindings."""
+        foil = ['*', ['+', ['?', 'a'], ['?', 'b']], ['+', ['?', 'c'], ['?', 'd']]]
+        like = ['+', ['*', ['?c', 'a'], ['?', 'x']], ['*', ['?c', 'b'], ['?', 'x']]]
+        self.assertEqual(match_strategy(freeze(foil)), 'shape-first')
+        self.assertEqual(match_strategy(freeze(['+', ['?', 'x'], 0])), 'in-order')
+        for pat, exp in [
+            (foil, ['*', ['+', 1, 'x'], ['+', 'y', 2]]),
+            (foil, ['*', ['+', 1, 'x'], ['-', 'y', 2]]),
+            (like, ['+', ['*', 3, 'x'], ['*', 5, 'x']]),
+            (like, ['+', ['*', 3, 'x'], ['*', 5, 'y']]),
+            (like, ['+', ['*', 'x', 3], ['*', 5, 'x']]),
+        ]:
+            with self.subTest(pattern=pat, expression=exp):
+                expected = match(pat, exp, empty_dictionary())
+                result = compile_pattern(freeze(pat))(exp)
+                self.assertEqual("failed" if result is None else result, expected)
+
+    def test_matcher_cached(self):
+        """Test equal patterns share one compiled matcher."""
+        self.assertIs(compile_pattern(freeze(['+', ['?', 'x'], 0])),
+                      compile_pattern(freeze(['+', ['?', 'x'], 0])))
+
+    def test_compiled_builder_agrees_with_instantiate(self):
+        """Test builders produce fresh lists equal to instantiate()."""
+        bindings = [['x', 3], ['y', ['sin', 'z']]]
+        for skel in [0, 'pi', [':', 'x'], ['+', [':', 'x'], 1.5],
+                     ['*', ['+', [':', 'x'], [':', 'y']], []], [':', ['+', 'x', 'x']],
+                     [':', [max, 'x', 2]], [':', [len, 'x']], [':', ['f', ['g', 'y'], 1.5, []]],
+                     [':', [['h', 'x'], 'x']], [':', print], [':', []]]:
+            with self.subTest(skeleton=skel):
+                build = compile_skeleton(freeze(skel))
+                self.assertEqual(build(bindings), instantiate(skel, bindings))
+                if isinstance(skel, list) and skel[0] != ':':
+                    self.assertIsNot(build(bindings), build(bindings))
+
+
+class TestFastReject(unittest.TestCase):
+    """Test the literal-mask/depth signature used to skip rules early."""
+
+    def test_pattern_signature(self):
+        """Test variables contribute no literal bits and count as leaves."""
+        self.assertEqual(literal_mask(freeze(['?', 'x'])), 0)
+        self.assertEqual(pattern_depth(freeze(['^', ['?', 'x'], 0])), 1)
+        self.assertEqual(pattern_depth(freeze(['*', ['+', ['?', 'a'], 1], 2])), 2)
+
+    def test_signature_never_rejects_a_match(self):
+        """Test a matching expression always covers the rule's signature."""
+        for pat, exp in TestCompiledRules.CASES:
+            entry = compile_rule([pat, 0], 0)
+            if entry.match(exp) is None:
+                continue
+            with self.subTest(pattern=pat, expression=exp):
+                mask, depth = expression_signature(exp, entry.depth)
+                self.assertEqual(entry.lits_mask & ~mask, 0)
+                self.assertGreaterEqual(depth, entry.depth)
+
+    def test_signature_rejects_missing_literal(self):
+        """Test an expression lacking a required literal is rejected."""
+        # Numbers only, so the hashed bits are deterministic
+        entry = compile_rule([[1, ['?', 'x'], 0], 1], 0)
+        mask, _ = expression_signature([1, 5, 2], entry.depth)
+        self.assertNotEqual(entry.lits_mask & ~mask, 0)
+
+
+class TestDecisionTree(unittest.TestCase):
+    """Test rule sets compiled into a decision tree."""
+
+    RULES = [
+        [['+', ['?', 'x'], 0], [':', 'x']],
+        [['*', ['?', 'x'], 1], [':', 'x']],
+        [[['?', 'op'], ['?', 'x'], 1], 'any-op'],
+        [['*', ['+', ['?', 'a'], ['?', 'b']], ['?', 'c']], 'distrib'],
+        {'pattern': ['*', 0, ['?', 'x']], 'skeleton': 0, 'commute': True},
+    ]
+
+    def test_candidates_agree_with_linear_scan(self):
+        """Test the first matching candidate is the first matching rule."""
+        tree = compile_rules(self.RULES)
+        for exp in [['+', 'y', 0], ['*', 'y', 1], ['+', 'y', 1], ['-', 'y', 1],
+                    ['*', ['+', 1, 'z'], 1], ['*', ['+', 1, 'z'], 'w'],
+                    ['*', 'y', 0], ['*', 0, 'y'], ['sin', 'y'], 'y', 0]:
+            with self.subTest(expression=exp):
+                expected = next(((entry.position, bindings) for entry in tree.rules
+                                 if (bindings := entry.match(exp)) is not None), None)
+                self.assertEqual(first_match(tree.candidates, exp), expected)
+
+    def test_switches_on_head_first(self):
+        """Test the tree tests the root shape, then the head operator."""
+        tree = compile_rules(self.RULES)
+        self.assertIsInstance(tree.root, Switch)
+        self.assertEqual(tree.root.path, ())
+        self.assertEqual(next(iter(tree.root.cases.values())).path, (0,))
+
+    def test_candidates_skip_other_heads(self):
+        """Test a leaf only holds rules consistent with the tested positions."""
+        tree = compile_rules(self.RULES)
+        self.assertEqual([e.position for e in tree.candidates(['+', 'y', 'z'])], [])
+        self.assertEqual([e.position for e in tree.candidates(['+', 'y', 1])], [2])
+        self.assertEqual([e.position for e in tree.candidates(['*', 0, 1])], [1, 2, 4])
+
+
+class TestHotRulePromotion(unittest.TestCase):
+    """Test decision tree leaves reordered by rule hit counts."""
+
+    RULES = [
+        [['f', ['?c', 'x']], 'num'],
+        [['f', ['?v', 'x']], 'sym'],
+        [['f', ['?', 'x']], 'any'],
+        [['f', ['?', 'x'], 1], 'one'],
+        [['f', 0, ['?', 'y']], 'zero'],
+    ]
+
+    def test_hot_rule_moves_past_disjoint_rules_only(self):
+        """Test a hot rule is tried before disjoint rules but not overlapping ones."""
+        tree = compile_rules(self.RULES)
+        promoted = tree.promoted([0, 5, 10, 0, 7])
+        self.assertIsNot(promoted, tree)
+        self.assertEqual([e.position for e in promoted.candidates(['f', 'y'])], [1, 0, 2])
+        # (f ?x 1) and (f 0 ?y) both match (f 0 1), so they keep rule order
+        self.assertEqual([e.position for e in promoted.candidates(['f', 0, 1])], [3, 4])
+
+    def test_promoted_dispatch_unchanged(self):
+        """Test promotion never changes which rule an expression dispatches to."""
+        tree = compile_rules(self.RULES + TestDecisionTree.RULES)
+        promoted = tree.promoted(list(range(1, len(tree.rules) + 1)))
+        for exp in [['f', 2], ['f', 'y'], ['f', ['g']], ['f', 0, 1], ['f', 0, 2],
+                    ['f', 3, 1]] + TestDecisionTreeCodegen.EXPRESSIONS:
+            with self.subTest(expression=exp):
+                self.assertEqual(first_match(promoted.candidates, exp),
+                                 first_match(tree.candidates, exp))
+                self.assertEqual(compile_candidates(promoted)(exp), promoted.candidates(exp))
+
+    def test_unchanged_order_returns_same_tree(self):
+        """Test a tree is returned as is when no leaf changes."""
+        tree = compile_rules(self.RULES)
+        self.assertIs(tree.promoted([0] * len(self.RULES)), tree)
+
+    def test_rewriter_results_stable_across_promotion(self):
+        """Test rewriting past the promotion interval keeps first-match results."""
+        from xtk.rewriter import rewriter, _PROMOTE_INTERVAL
+        simplify = rewriter(self.RULES[3:] + [[['g', ['?v', 'x']], 'sym']],
+                            constant_folding=False)
+        for i in range(_PROMOTE_INTERVAL + 10):
+            self.assertEqual(simplify(['f', 0, i + 2]), 'zero')
+        self.assertEqual(simplify(['f', 0, 1]), 'one')
+
+
+class TestShadowedRules(unittest.TestCase):
+    """Test duplicate left-hand sides are detected and skipped."""
+
+    def test_pattern_key_alpha_renames(self):
+        """Test keys ignore variable names but not repeated variables or kinds."""
+        def key(pat):
+            return pattern_key(freeze(pat))
+
+        self.assertEqual(key(['+', ['?', 'x'], 0]), key(['+', ['?', 'y'], 0]))
+        self.assertNotEqual(key(['+', ['?', 'x'], ['?', 'x']]), key(['+', ['?', 'x'], ['?', 'y']]))
+        self.assertNotEqual(key(['+', ['?', 'x'], 0]), key(['+', ['?c', 'x'], 0]))
+
+    def test_drop_shadowed(self):
+        """Test a later rule with an equivalent pattern is dropped, unless guarded."""
+        from xtk.rewriter import _drop_shadowed
+        rules = [{'pattern': ['f', ['?', 'a']], 'skeleton': 'guarded', 'when': lambda b: False},
+                 [['f', ['?', 'x']], 'first'],
+                 [['f', ['?', 'y']], 'shadowed'],
+                 {'pattern': ['g', ['?', 'x'], 0], 'skeleton': 'both', 'commute': True},
+                 [['g', 0, ['?', 'z']], 'mirror'],
+                 [['g', ['?', 'z'], ['?', 'z']], 'kept']]
+        kept = _drop_shadowed([compile_rule(rule, i) for i, rule in enumerate(rules)])
+        self.assertEqual([entry.position for entry in kept], [0, 1, 3, 5])
+
+    def test_rewriter_keeps_first_of_duplicates(self):
+        """Test results are unchanged, and prefer_reducing still weighs duplicates."""
+        from xtk.rewriter import rewriter
+        rules = [[['f', ['?', 'x']], ['g', ['h', [':', 'x']]]], [['f', ['?', 'y']], 'short']]
+        self.assertEqual(rewriter(rules)(['f', 1]), ['g', ['h', 1]])
+        self.assertEqual(rewriter(rules, prefer_reducing=True)(['f', 1]), 'short')
+
+
+class TestDecisionTreeCodegen(unittest.TestCase):
+    """Test decision trees compiled to straight-line dispatch functions."""
+
+    EXPRESSIONS = [['+', 'y', 0], ['*', 'y', 1], ['+', 'y', 1], ['-', 'y', 1],
+                   ['*', ['+', 1, 'z'], 1], ['*', ['+', 1, 'z'], 'w'], ['*', 0, 'y'],
+                   ['*', 0.0, True], ['sin', 'y'], 'y', 0, print, [print, 1]]
+
+    def test_generated_functions_agree_with_tree(self):
+        """Test the generated candidate lookup matches the interpreted tree."""
+        tree = compile_rules(TestDecisionTree.RULES)
+        candidates = compile_candidates(tree)
+        self.assertIsNot(candidates, tree.candidates)
+        for exp in self.EXPRESSIONS:
+            with self.subTest(expression=exp):
+                self.assertEqual(candidates(exp), tree.candidates(exp))
+
+    def test_bundled_rules_compile(self):
+        """Test a bundled rule set compiles to a generated function."""
+        from xtk.rules.deriv_rules import deriv_rules_fixed
+        tree = compile_rules(deriv_rules_fixed)
+        candidates = compile_candidates(tree)
+        self.assertIsNot(candidates, tree.candidates)
+        self.assertEqual(first_match(candidates, ['dd', ['sin', 'x'], 'x']),
+                         first_match(tree.candidates, ['dd', ['sin', 'x'], 'x']))
+
+
+if __name__ == '__main__':
+    unittest.main()
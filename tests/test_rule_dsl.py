@@ -132,6 +132,18 @@ class TestParseRuleLine(unittest.TestCase):
         result = parse_rule_line("(+ ?x 0) :x")
         self.assertIsNone(result)
 
+    def test_invalid_unbalanced_parens(self):
+        """Test rules with unbalanced parentheses return None."""
+        self.assertIsNone(parse_rule_line("(+ ?x 0 => :x"))
+        self.assertIsNone(parse_rule_line("(+ ?x 0)) => :x"))
+        self.assertIsNone(parse_rule_line("(+ ?x 0) => (* :x"))
+        self.assertIsNone(parse_rule_line("(+ ?x 0) => )"))
+
+    def test_invalid_empty_side(self):
+        """Test rules with an empty pattern or skeleton return None."""
+        self.assertIsNone(parse_rule_line("=> :x"))
+        self.assertIsNone(parse_rule_line("(+ ?x 0) =>"))
+
 
 class TestParseDsl(unittest.TestCase):
     """Test multi-line DSL parsing."""
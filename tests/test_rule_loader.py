@@ -67,6 +67,13 @@ class TestIsRuleFormat(unittest.TestCase):
         self.assertTrue(is_rule_format([['+', 'x', 0], 'x']))
         self.assertTrue(is_rule_format([['?', 'x'], [':', 'x']]))
         self.assertTrue(is_rule_format([1, 2]))  # Simple pair
+
+    def test_rule_format_accepts_subclasses(self):
+        """Test list subclasses and bools count as rule elements."""
+        class Expr(list):
+            pass
+        self.assertTrue(is_rule_format(Expr([Expr(['+', 'x', 0]), 'x'])))
+        self.assertTrue(is_rule_format([['f', ['?', 'x']], True]))
     
     def test_invalid_rule_format(self):
         """Test invalid rule formats."""
@@ -123,6 +130,15 @@ class TestParseRules(unittest.TestCase):
         rules = parse_rules(lisp_str)
         self.assertEqual(len(rules), 2)
     
+    def test_parse_results_are_independent(self):
+        """Test that mutating parsed rules doesn't affect later parses."""
+        lisp_str = "((+ (? x) 0) (: x))"
+        first = parse_rules(lisp_str)
+        first[0][0][1][1] = 'mutated'
+
+        second = parse_rules(lisp_str)
+        self.assertEqual(second[0][0], ['+', ['?', 'x'], 0])
+
     def test_parse_empty(self):
         """Test parsing empty input."""
         self.assertEqual(parse_rules(""), [])
@@ -226,6 +242,66 @@ class TestLoadRules(unittest.TestCase):
         loaded = load_rules(empty_file)
         self.assertEqual(loaded, [])
 
+    def test_load_python_file(self):
+        """Test loading rule lists from a Python module in definition order."""
+        py_file = self.temp_path / "rules_mod.py"
+        with open(py_file, 'w') as f:
+            f.write("import math\n")
+            f.write("second = [[['*', ['?', 'x'], 1], [':', 'x']]]\n")
+            f.write("first = [[['+', ['?', 'x'], 0], [':', 'x']]]\n")
+            f.write("_private = [[['-', ['?', 'x'], 0], [':', 'x']]]\n")
+
+        loaded = load_rules(py_file)
+        self.assertEqual(loaded, [
+            [['*', ['?', 'x'], 1], [':', 'x']],
+            [['+', ['?', 'x'], 0], [':', 'x']],
+        ])
+
+    def test_load_python_file_respects_all(self):
+        """Test that __all__ restricts which rule lists are collected."""
+        py_file = self.temp_path / "rules_all.py"
+        with open(py_file, 'w') as f:
+            f.write("__all__ = ['exported']\n")
+            f.write("exported = [[['+', ['?', 'x'], 0], [':', 'x']]]\n")
+            f.write("hidden = [[['*', ['?', 'x'], 1], [':', 'x']]]\n")
+
+        loaded = load_rules(py_file)
+        self.assertEqual(loaded, [[['+', ['?', 'x'], 0], [':', 'x']]])
+
+    def test_bundled_rule_modules_load(self):
+        """Test every bundled hyphenated rule module loads as rule pairs."""
+        import xtk.rules
+        rules_dir = Path(xtk.rules.__file__).parent
+        for name in ('limit-rules.py', 'exp-log.py', 'trig-rules.py'):
+            with self.subTest(module=name):
+                rules = load_rules(rules_dir / name)
+                self.assertTrue(rules)
+                self.assertTrue(all(is_rule_format(rule) for rule in rules))
+
+    def test_rules_package_loads_lazily(self):
+        """Test rule sets are exported from xtk.rules on first access."""
+        import subprocess
+        import sys
+        code = ("import sys, xtk.rules; "
+                "assert 'xtk.rules.integral_rules' not in sys.modules; "
+                "xtk.rules.integral_rules; "
+                "assert 'xtk.rules.integral_rules' in sys.modules")
+        subprocess.run([sys.executable, '-c', code], check=True)
+
+        import xtk.rules
+        self.assertIs(xtk.rules.trig_rules, xtk.rules.trig_rules)
+        self.assertTrue(all(is_rule_format(rule) for rule in xtk.rules.exp_log_rules))
+        with self.assertRaises(AttributeError):
+            xtk.rules.no_such_rules
+
+    def test_limit_rules(self):
+        """Test the limit rules use one (-> var point) form."""
+        import xtk.rules
+        from xtk.rewriter import rewriter
+        limit = rewriter(load_rules(Path(xtk.rules.__file__).parent / 'limit-rules.py'))
+        self.assertEqual(limit(['lim', ['->', 'x', 2], 5]), 5)
+        self.assertEqual(limit(['lim', ['->', 'x', 2], 'x']), 2)
+
 
 class TestSaveRules(unittest.TestCase):
     """Test saving rules to files."""
@@ -383,6 +459,12 @@ class TestFormatRulesAsLisp(unittest.TestCase):
         self.assertIn("sin", result)
         self.assertIn("cos", result)
 
+    def test_format_bundled_simplify_rules(self):
+        """Test the bundled simplify_rules format as Lisp and parse back unchanged."""
+        from xtk.rules.algebra_rules import simplify_rules
+        result = format_rules_as_lisp(simplify_rules)
+        self.assertEqual(parse_rules(result), simplify_rules)
+
 
 class TestIntegration(unittest.TestCase):
     """Integration tests for rule loading system."""
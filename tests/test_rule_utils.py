@@ -170,6 +170,94 @@ class TestNormalizeRules(unittest.TestCase):
         self.assertEqual(rich_rules[0].description, 'Addition is associative')
 
 
+class TestRichRuleSlots(unittest.TestCase):
+    """Test RichRule is a compact slotted object."""
+
+    def test_no_instance_dict(self):
+        """Test RichRule instances carry no per-instance __dict__."""
+        rich_rule = RichRule(pattern=['+', ['?', 'x'], 0], skeleton=[':', 'x'])
+        self.assertFalse(hasattr(rich_rule, '__dict__'))
+        with self.assertRaises(AttributeError):
+            rich_rule.priority = 1
+
+
+class TestCommutativeRules(unittest.TestCase):
+    """Test rules marked as commutative."""
+
+    RULE = {'pattern': ['+', ['?', 'x'], 0], 'skeleton': [':', 'x'],
+            'commute': True, 'name': 'add-zero'}
+
+    def test_normalize_expands_commute(self):
+        """Test a commutative rule expands to both orientations."""
+        rule_pairs, rich_rules = normalize_rules([self.RULE])
+        self.assertEqual(rule_pairs, [
+            [['+', ['?', 'x'], 0], [':', 'x']],
+            [['+', 0, ['?', 'x']], [':', 'x']],
+        ])
+        self.assertEqual(len(rich_rules), 2)
+        self.assertIs(rich_rules[0], rich_rules[1])
+        self.assertTrue(rich_rules[0].commute)
+
+    def test_rewriter_matches_both_orders(self):
+        """Test the rewriter applies a commutative dict rule either way round."""
+        from xtk.rewriter import rewriter
+        simplify = rewriter([self.RULE])
+        self.assertEqual(simplify(['+', 'y', 0]), 'y')
+        self.assertEqual(simplify(['+', 0, 'y']), 'y')
+        self.assertEqual(simplify(['-', 0, 'y']), ['-', 0, 'y'])
+
+    def test_simplify_rules_are_plain_pairs(self):
+        """Test the bundled identity rules are [pattern, skeleton] pairs covering both orders."""
+        from xtk.rewriter import rewriter
+        from xtk.rules.algebra_rules import simplify_rules
+        for rule in simplify_rules:
+            self.assertIsInstance(rule, list)
+            self.assertEqual(len(rule), 2)
+        simplify = rewriter(simplify_rules)
+        for exp in (['+', 0, 'y'], ['+', 'y', 0], ['*', 1, 'y'], ['*', 'y', 1]):
+            self.assertEqual(simplify(exp), 'y')
+        self.assertEqual(simplify(['*', 0, 'y']), 0)
+
+
+class TestRuleConditions(unittest.TestCase):
+    """Test rules guarded by a "when" side condition."""
+
+    @staticmethod
+    def unknown_function(bindings):
+        return bindings['g'] not in ('sin', '+')
+
+    def test_condition_guards_catch_all_rule(self):
+        """Test a catch-all chain rule listed first leaves known functions alone."""
+        from xtk.rewriter import rewriter
+        chain = {'pattern': ['dd', [['?v', 'g'], ['?', 'u']], ['?v', 'v']],
+                 'skeleton': ['*', ['D', [':', 'g'], [':', 'u']], ['dd', [':', 'u'], [':', 'v']]],
+                 'when': self.unknown_function}
+        sin_rule = [['dd', ['sin', ['?v', 'x']], ['?v', 'x']], ['cos', [':', 'x']]]
+        deriv = rewriter([chain, sin_rule])
+        self.assertEqual(deriv(['dd', ['sin', 'x'], 'x']), ['cos', 'x'])
+        self.assertEqual(deriv(['dd', ['h', ['sin', 'x']], 'x']),
+                         ['*', ['D', 'h', ['sin', 'x']], ['cos', 'x']])
+
+    def test_condition_on_bindings(self):
+        """Test the predicate sees the bindings by name."""
+        import math
+        from xtk.rewriter import rewriter
+        rule = {'pattern': ['sqrt', ['?c', 'x']], 'skeleton': [':', [math.sqrt, 'x']],
+                'when': lambda b: b['x'] >= 0}
+        simplify = rewriter([rule])
+        self.assertEqual(simplify(['sqrt', 4]), 2.0)
+        self.assertEqual(simplify(['sqrt', -4]), ['sqrt', -4])
+
+    def test_normalize_keeps_condition(self):
+        """Test normalize_rules keeps the condition on every expanded rule."""
+        rule = {'pattern': ['+', ['?', 'x'], 0], 'skeleton': [':', 'x'],
+                'commute': True, 'when': self.unknown_function}
+        rule_pairs, rich_rules = normalize_rules([rule])
+        self.assertIs(rich_rules[0].when, self.unknown_function)
+        self.assertEqual([pair['when'] for pair in rule_pairs], [self.unknown_function] * 2)
+        self.assertEqual(rule_pairs[1]['pattern'], ['+', 0, ['?', 'x']])
+
+
 class TestRichRuleIntegration(unittest.TestCase):
     """Integration tests for RichRule with actual rule files."""
 
@@ -196,6 +284,35 @@ class TestRichRuleIntegration(unittest.TestCase):
         except ImportError:
             self.skipTest("algebra_rules_rich module not found")
 
+    def test_algebra_left_right_aliases(self):
+        """Test the old left/right rule names still import as the merged rules."""
+        from xtk.rules import algebra_rules_rich as rich
+        self.assertIs(rich.add_zero_right, rich.add_zero)
+        self.assertIs(rich.add_zero_left, rich.add_zero)
+        self.assertIs(rich.distrib_left, rich.distrib)
+        self.assertIs(rich.collect_add_const_left, rich.collect_add_const)
+
+    def test_deriv_var_rule_covers_both_cases(self):
+        """Test the single variable rule gives 1 for x and 0 for other variables."""
+        from xtk.rewriter import rewriter
+        from xtk.rules.deriv_rules_rich import basic_deriv_rules
+        deriv = rewriter(basic_deriv_rules)
+        self.assertEqual(deriv(['dd', 'x', 'x']), 1)
+        self.assertEqual(deriv(['dd', 'y', 'x']), 0)
+        self.assertEqual(deriv(['dd', 3, 'x']), 0)
+
+    def test_deriv_var_rule_serializes(self):
+        """Test the variable rule is plain data that survives JSON and Lisp."""
+        import json
+        from xtk.rewriter import rewriter
+        from xtk.rule_loader import format_rules_as_lisp, parse_rules
+        from xtk.rules.deriv_rules_rich import basic_deriv_rules
+        rules, _ = normalize_rules(basic_deriv_rules)
+        for loaded in (json.loads(json.dumps(rules)), parse_rules(format_rules_as_lisp(rules))):
+            deriv = rewriter(loaded)
+            self.assertEqual(deriv(['dd', 'x', 'x']), 1)
+            self.assertEqual(deriv(['dd', 'y', 'x']), 0)
+
     def test_load_deriv_rules_rich(self):
         """Test loading deriv_rules_rich.py if it exists."""
         try:
@@ -227,5 +227,15 @@ class TestSimplifierFixed(unittest.TestCase):
         expected = ['+', 'a', ['+', 'b', 'c']]
         self.assertEqual(result, expected, "Associativity rule should work without recursion")
 
+    def test_erf_derivative(self):
+        """Test d/dx erf(x) = 2/sqrt(pi) * exp(-x^2), directly and via the chain rule."""
+        from xtk.rules.deriv_rules import deriv_rules_fixed
+        simplify = simplifier(deriv_rules_fixed)
+        gaussian = ['exp', ['-', 0, ['^', 'x', 2]]]
+        self.assertEqual(simplify(['dd', ['erf', 'x'], 'x']),
+                         ['*', ['/', 2, ['sqrt', 'pi']], gaussian])
+        result = simplify(['dd', ['erf', ['*', 3, 'x']], 'x'])
+        self.assertEqual(result[1][2], ['exp', ['-', 0, ['^', ['*', 3, 'x'], 2]]])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -40,6 +40,16 @@ class TestStepLoggerInitialization(unittest.TestCase):
         # Should not raise an exception
         datetime.fromisoformat(logger.session_id)
 
+    def test_session_id_is_stable(self):
+        """Test session_id is formatted once and tracks the wall clock."""
+        before = datetime.now()
+        logger = StepLogger()
+        after = datetime.now()
+        self.assertIs(logger.session_id, logger.session_id)
+        started = datetime.fromisoformat(logger.session_id)
+        self.assertLessEqual(abs((started - before).total_seconds()), 1)
+        self.assertLessEqual(abs((after - started).total_seconds()), 1)
+
     def test_init_multiple_loggers_have_different_sessions(self):
         """Test that multiple logger instances have different session IDs."""
         logger1 = StepLogger()
@@ -64,7 +74,7 @@ class TestLogInitial(unittest.TestCase):
         self.assertEqual(step['type'], 'initial')
         self.assertEqual(step['expression'], ['+', 'x', 1])
         self.assertEqual(step['metadata'], {})
-        self.assertIn('timestamp', step)
+        self.assertIsInstance(step['timestamp_ns'], int)
 
     def test_log_initial_with_metadata(self):
         """Test logging initial expression with metadata."""
@@ -320,6 +330,26 @@ class TestGetSteps(unittest.TestCase):
             self.assertEqual(step['step'], i)
             self.assertEqual(step['expression'], i)
 
+    def test_iterate_without_copying(self):
+        """Test iterating the logger yields the stored steps in order."""
+        logger = StepLogger()
+        self.assertTrue(logger)
+        self.assertEqual(len(logger), 0)
+        logger.log_initial('x')
+        logger.log_final('y')
+
+        self.assertEqual(len(logger), 2)
+        steps = list(logger)
+        self.assertIs(steps[0], logger.steps[0])
+        self.assertEqual([step['type'] for step in logger], ['initial', 'final'])
+
+    def test_get_steps_snapshot_is_independent(self):
+        """Test modifying a snapshot's steps leaves the logger untouched."""
+        logger = StepLogger()
+        logger.log_initial('x')
+        logger.get_steps()[0]['expression'] = 'changed'
+        self.assertEqual(logger.steps[0]['expression'], 'x')
+
 
 class TestClear(unittest.TestCase):
     """Test clear() method."""
@@ -529,6 +559,151 @@ class TestSave(unittest.TestCase):
         self.assertEqual(len(data['steps']), 1)
         self.assertEqual(data['steps'][0]['expression'], 'second')
 
+    def test_save_adds_iso_timestamps(self):
+        """Test saved steps carry an ISO timestamp derived from the clock reading."""
+        output_file = self.temp_path / 'timestamps.json'
+        logger = StepLogger(output_path=output_file)
+        logger.log_initial('x')
+        logger.save()
+
+        with open(output_file, 'r') as f:
+            step = json.load(f)['steps'][0]
+        self.assertGreaterEqual(datetime.fromisoformat(step['timestamp']),
+                                datetime.fromisoformat(logger.session_id))
+        self.assertNotIn('timestamp', logger.steps[0])
+
+    def test_save_compact_by_default(self):
+        """Test the default output is compact and pretty=True indents it."""
+        compact_file = self.temp_path / 'compact.json'
+        pretty_file = self.temp_path / 'pretty.json'
+        logger = StepLogger()
+        logger.log_initial(['+', 'x', 1])
+        logger.save(output_path=compact_file)
+        logger.save(output_path=pretty_file, pretty=True)
+
+        compact = compact_file.read_text()
+        pretty = pretty_file.read_text()
+        self.assertNotIn('\n', compact)
+        self.assertIn('\n  "', pretty)
+        self.assertEqual(json.loads(compact), json.loads(pretty))
+
+    def test_save_big_integers(self):
+        """Test integers too wide for a 64-bit encoder are still saved."""
+        output_file = self.temp_path / 'big.json'
+        logger = StepLogger(output_path=output_file)
+        logger.log_initial(['*', 2 ** 80, 'x'])
+        logger.save()
+
+        with open(output_file, 'r') as f:
+            data = json.load(f)
+        self.assertEqual(data['steps'][0]['expression'], ['*', 2 ** 80, 'x'])
+
+
+class TestStreaming(unittest.TestCase):
+    """Test streaming steps to a JSONL file as they are logged."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_file = Path(self.temp_dir) / 'steps.jsonl'
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_lines(self):
+        with open(self.output_file, 'r') as f:
+            return [json.loads(line) for line in f]
+
+    def test_stream_writes_one_line_per_step(self):
+        """Test the file holds a session header then one line per step."""
+        logger = StepLogger(output_path=self.output_file, stream=True)
+        logger.log_initial(['+', 'x', 0])
+        logger.log_rewrite(['+', 'x', 0], 'x', [], [])
+        logger.log_final('x')
+        logger.save()
+
+        lines = self.read_lines()
+        self.assertEqual(lines[0]['session_id'], logger.session_id)
+        self.assertEqual([line['type'] for line in lines[1:]], ['initial', 'rewrite', 'final'])
+        self.assertEqual(lines[2]['after'], 'x')
+        self.assertEqual(len(logger.steps), 3)
+
+    def test_stream_without_memory(self):
+        """Test keep_in_memory=False streams steps without storing them."""
+        logger = StepLogger(output_path=self.output_file, stream=True, keep_in_memory=False)
+        for i in range(5):
+            logger.log_simplification(i, i + 1, 'arithmetic')
+        logger.save()
+
+        self.assertEqual(logger.steps, [])
+        self.assertEqual(logger.step_count, 5)
+        self.assertEqual(len(self.read_lines()), 6)
+
+    def test_second_save_keeps_stream(self):
+        """Test saving again to the default path does not overwrite the stream."""
+        logger = StepLogger(output_path=self.output_file, stream=True, keep_in_memory=False)
+        for i in range(3):
+            logger.log_simplification(i, i + 1, 'arithmetic')
+        logger.save()
+        logger.save()
+
+        lines = self.read_lines()
+        self.assertEqual([line.get('before') for line in lines], [None, 0, 1, 2])
+
+    def test_clear_restarts_stream(self):
+        """Test clear() starts a fresh file for the new session."""
+        logger = StepLogger(output_path=self.output_file, stream=True)
+        logger.log_initial('x')
+        logger.clear()
+        logger.log_initial('y')
+        logger.save()
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1]['expression'], 'y')
+
+    def test_background_writer(self):
+        """Test a background writer writes every step, in order, by save()."""
+        logger = StepLogger(output_path=self.output_file, stream=True,
+                            keep_in_memory=False, background=True)
+        for i in range(1000):
+            logger.log_simplification(i, i + 1, 'arithmetic')
+        logger.save()
+
+        lines = self.read_lines()
+        self.assertEqual([line['before'] for line in lines[1:]], list(range(1000)))
+        self.assertFalse(logger._writer)
+
+    def test_context_manager_flushes_background_writer(self):
+        """Test leaving a with block writes every queued step and closes the file."""
+        with StepLogger(output_path=self.output_file, stream=True,
+                        keep_in_memory=False, background=True) as logger:
+            for i in range(100):
+                logger.log_simplification(i, i + 1, 'arithmetic')
+
+        self.assertIsNone(logger._fh)
+        self.assertFalse(logger._writer)
+        self.assertEqual([line['before'] for line in self.read_lines()[1:]], list(range(100)))
+        logger.close()
+
+    def test_background_writer_restarts_on_clear(self):
+        """Test clear() drains the old stream and starts a new writer."""
+        logger = StepLogger(output_path=self.output_file, stream=True, background=True)
+        logger.log_initial('x')
+        logger.clear()
+        logger.log_initial('y')
+        logger.save()
+
+        lines = self.read_lines()
+        self.assertEqual([line.get('expression') for line in lines], [None, 'y'])
+
+    def test_background_writer_error_raised_on_save(self):
+        """Test a step that cannot be serialized fails save(), not logging."""
+        logger = StepLogger(output_path=self.output_file, stream=True, background=True)
+        logger.log_initial('x', metadata={'bad': object()})
+        with self.assertRaises(TypeError):
+            logger.save()
+        self.assertIsNone(logger._fh)
+
 
 class TestEdgeCases(unittest.TestCase):
     """Test edge cases and unusual inputs."""